@@ -0,0 +1,82 @@
+"""Compare JSON codecs on realistic request bodies.
+
+Usage: python -m benchmarks.bench_codec [--number 20]
+"""
+
+import argparse
+import asyncio
+import time
+import typing
+
+import fastapi
+
+from fastexec import FastExec
+from fastexec.utils.codec import CODECS, JSONCodec, get_codec
+
+BODY_SIZES = {"10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000}
+
+
+def make_body(size: int) -> typing.Dict[typing.Text, typing.Any]:
+    record = {
+        "id": 0,
+        "name": "Sample Item",
+        "description": "This is a sample item.",
+        "price": 29.99,
+        "tax": 2.5,
+        "tags": ["electronics", "sale", "featured"],
+        "in_stock": True,
+    }
+    count = max(1, size // len(JSONCodec().dumps(record)))
+    return {"items": [{**record, "id": i} for i in range(count)]}
+
+
+def timeit(func: typing.Callable[[], typing.Any], number: int) -> float:
+    func()  # Warm up
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number
+
+
+async def atimeit(
+    func: typing.Callable[[], typing.Awaitable[typing.Any]], number: int
+) -> float:
+    await func()  # Warm up
+    started = time.perf_counter()
+    for _ in range(number):
+        await func()
+    return (time.perf_counter() - started) / number
+
+
+async def endpoint(request: fastapi.Request):
+    # Reads raw bytes and parses them, as a body-consuming endpoint would
+    return len((await request.json())["items"])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'codec':<8} {'body':>6} {'dumps':>10} {'loads':>10} {'exec':>10}")
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"{name:<8} not installed")
+            continue
+        app = FastExec(call=endpoint, codec=codec)
+        for label, size in BODY_SIZES.items():
+            body = make_body(size)
+            encoded = codec.dumps(body)
+            dumps = timeit(lambda: codec.dumps(body), args.number)
+            loads = timeit(lambda: codec.loads(encoded), args.number)
+            exec_ = await atimeit(lambda: app.exec(body=encoded), args.number)
+            print(
+                f"{name:<8} {label:>6} {dumps * 1e3:>8.3f}ms "
+                f"{loads * 1e3:>8.3f}ms {exec_ * 1e3:>8.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
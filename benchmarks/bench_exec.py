@@ -0,0 +1,345 @@
+"""Measure FastExec overhead across dependency graph shapes and payload sizes.
+
+Usage:
+    python -m benchmarks.bench_exec                    # Run and print the report
+    python -m benchmarks.bench_exec --save baseline    # Save results as a baseline
+    python -m benchmarks.bench_exec --compare baseline # Fail on p50/allocation regressions
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+import typing
+
+import fastapi
+
+from fastexec import FastExec
+
+BASELINES_DIR = pathlib.Path(__file__).parent.joinpath("baselines")
+
+
+@dataclasses.dataclass
+class Scenario:
+    name: str
+    call: typing.Callable
+    exec_kwargs: typing.Dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+    # Plain call of the function, the overhead baseline
+    direct: typing.Optional[typing.Callable[[], typing.Awaitable]] = None
+
+
+@dataclasses.dataclass
+class Result:
+    name: str
+    calls: int
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    throughput: float
+    alloc_bytes: float
+    direct_p50_us: typing.Optional[float] = None
+
+
+# Graph shapes
+
+
+def make_chain(depth: int, is_async: bool) -> typing.Callable:
+    def root():
+        return 0
+
+    async def async_root():
+        return 0
+
+    prev = async_root if is_async else root
+    for _ in range(depth):
+
+        def make(dep):
+            if is_async:
+
+                async def node(value: int = fastapi.Depends(dep)):
+                    return value + 1
+
+            else:
+
+                def node(value: int = fastapi.Depends(dep)):
+                    return value + 1
+
+            return node
+
+        prev = make(prev)
+    return prev
+
+
+def make_fan_out(width: int) -> typing.Callable:
+    deps = []
+    for index in range(width):
+
+        def make(index):
+            async def leaf():
+                return index
+
+            return leaf
+
+        deps.append(make(index))
+
+    # Same shape as `def endpoint(d0=Depends(leaf0), d1=Depends(leaf1), ...)`
+    params = ", ".join(f"d{i}: int = fastapi.Depends(deps[{i}])" for i in range(width))
+    namespace = {"fastapi": fastapi, "deps": deps}
+    exec(f"async def endpoint({params}):\n    return {width}", namespace)
+    return namespace["endpoint"]
+
+
+def make_diamond() -> typing.Callable:
+    # The DAG from `tests/test_fast_exec.py`
+    config = {"db_connection_string": "sqlite://", "api_key": "secret"}
+
+    def get_config():
+        return {**config}
+
+    def get_db(config: dict = fastapi.Depends(get_config)):
+        return f"db {config['db_connection_string']}"
+
+    def get_auth_service(config: dict = fastapi.Depends(get_config)):
+        return f"auth {config['api_key']}"
+
+    def initialize_resources(
+        db: str = fastapi.Depends(get_db),
+        auth_service: str = fastapi.Depends(get_auth_service),
+        config: dict = fastapi.Depends(get_config),
+    ):
+        return {**config, "db": db, "auth_service": auth_service}
+
+    def process_data(initialization: dict = fastapi.Depends(initialize_resources)):
+        return {**initialization, "processed": True}
+
+    def save_results(
+        data: dict = fastapi.Depends(process_data),
+        db: str = fastapi.Depends(get_db),
+    ):
+        return {**data, "saved": True}
+
+    async def notify_completion(
+        body: dict = fastapi.Body(default_factory=dict),
+        save: dict = fastapi.Depends(save_results),
+        auth_service: str = fastapi.Depends(get_auth_service),
+    ):
+        return {**save, "notified": True}
+
+    return notify_completion
+
+
+def make_yield() -> typing.Callable:
+    async def get_session():
+        yield "session"
+
+    def get_sync_session():
+        yield "sync session"
+
+    async def endpoint(
+        session: str = fastapi.Depends(get_session),
+        sync_session: str = fastapi.Depends(get_sync_session),
+    ):
+        return session, sync_session
+
+    return endpoint
+
+
+def make_body(size: int) -> typing.Dict[str, typing.Any]:
+    record = {"id": 0, "name": "Sample Item", "price": 29.99, "tags": ["a", "b"]}
+    count = size // len(json.dumps(record))
+    return {"items": [{**record, "id": i} for i in range(count)]}
+
+
+async def body_endpoint(body: dict = fastapi.Body()):
+    return len(body)
+
+
+async def echo(value: int = 0):
+    return value
+
+
+def get_scenarios() -> typing.List[Scenario]:
+    scenarios = [
+        Scenario("no_deps", echo, direct=lambda: echo(value=0)),
+        Scenario("chain_10_sync", make_chain(10, is_async=False)),
+        Scenario("chain_10_async", make_chain(10, is_async=True)),
+        Scenario("chain_50_async", make_chain(50, is_async=True)),
+        Scenario("fan_out_20", make_fan_out(20)),
+        Scenario("diamond", make_diamond(), {"body": {"name": "Sample Item"}}),
+        Scenario("yield_deps", make_yield()),
+    ]
+    for label, size in (("0B", 0), ("10KB", 10_000), ("1MB", 1_000_000)):
+        scenarios.append(
+            Scenario(f"body_{label}", body_endpoint, {"body": make_body(size)})
+        )
+    scenarios.append(
+        Scenario(
+            "body_4MB_bytes",
+            body_endpoint,
+            {"body": json.dumps(make_body(4_000_000)).encode("utf-8")},
+        )
+    )
+    return scenarios
+
+
+async def measure(
+    func: typing.Callable[[], typing.Awaitable], min_time: float, max_calls: int
+) -> typing.List[float]:
+    await func()  # Warm up
+    timings: typing.List[float] = []
+    started = time.perf_counter()
+    while len(timings) < max_calls and time.perf_counter() - started < min_time:
+        call_started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - call_started)
+    return timings
+
+
+async def measure_allocations(
+    func: typing.Callable[[], typing.Awaitable], calls: int = 20
+) -> float:
+    # Mean peak of memory allocated while a call runs
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(calls):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks)
+
+
+def percentile(timings: typing.List[float], q: int) -> float:
+    if len(timings) < 2:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method="inclusive")[q - 1]
+
+
+async def run_scenario(scenario: Scenario, min_time: float, max_calls: int) -> Result:
+    app = FastExec(call=scenario.call)
+
+    async def exec_once():
+        return await app.exec(**scenario.exec_kwargs)
+
+    timings = await measure(exec_once, min_time, max_calls)
+    direct_p50 = None
+    if scenario.direct is not None:
+        direct_p50 = percentile(await measure(scenario.direct, min_time, max_calls), 50)
+    return Result(
+        name=scenario.name,
+        calls=len(timings),
+        p50_us=percentile(timings, 50) * 1e6,
+        p90_us=percentile(timings, 90) * 1e6,
+        p99_us=percentile(timings, 99) * 1e6,
+        throughput=len(timings) / sum(timings),
+        alloc_bytes=await measure_allocations(exec_once),
+        direct_p50_us=direct_p50 * 1e6 if direct_p50 is not None else None,
+    )
+
+
+def print_report(results: typing.List[Result]) -> None:
+    print(
+        f"{'scenario':<16} {'calls':>7} {'p50':>10} {'p90':>10} {'p99':>10} "
+        f"{'calls/s':>10} {'alloc/call':>12} {'direct p50':>11}"
+    )
+    for r in results:
+        direct = f"{r.direct_p50_us:>9.1f}us" if r.direct_p50_us is not None else ""
+        print(
+            f"{r.name:<16} {r.calls:>7} {r.p50_us:>8.1f}us {r.p90_us:>8.1f}us "
+            f"{r.p99_us:>8.1f}us {r.throughput:>10.0f} {r.alloc_bytes:>10.0f}B "
+            f"{direct:>11}"
+        )
+
+
+# Latency percentiles depend on the machine and are noisy, allocations are not
+LATENCY_METRICS = ("p50_us",)
+
+
+def compare(
+    results: typing.List[Result],
+    baseline: typing.Dict[str, typing.Dict],
+    tolerance: float,
+    metrics: typing.Sequence[str] = ("p50_us", "alloc_bytes"),
+    min_calls: int = 100,
+) -> typing.List[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None:
+            continue
+        for metric in metrics:
+            if metric in LATENCY_METRICS and min(r.calls, base["calls"]) < min_calls:
+                continue  # Too few samples for a stable latency
+            current, previous = getattr(r, metric), base[metric]
+            if previous and current > previous * (1 + tolerance):
+                regressions.append(
+                    f"{r.name}.{metric}: {previous:.1f} -> {current:.1f} "
+                    f"(+{(current / previous - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--max-calls", type=int, default=5000)
+    parser.add_argument("--filter", default="", help="Run scenarios containing this")
+    parser.add_argument("--save", metavar="NAME", help="Save results as a baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--metrics",
+        default="p50_us,alloc_bytes",
+        help="Comma separated metrics compared with the baseline",
+    )
+    parser.add_argument(
+        "--min-calls",
+        type=int,
+        default=100,
+        help="Skip latency comparisons of scenarios with fewer calls",
+    )
+    args = parser.parse_args()
+
+    results = [
+        await run_scenario(scenario, args.min_time, args.max_calls)
+        for scenario in get_scenarios()
+        if args.filter in scenario.name
+    ]
+    print_report(results)
+
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR.joinpath(f"{args.save}.json")
+        path.write_text(
+            json.dumps({r.name: dataclasses.asdict(r) for r in results}, indent=2)
+        )
+        print(f"Saved baseline to {path}")
+
+    if args.compare:
+        path = BASELINES_DIR.joinpath(f"{args.compare}.json")
+        regressions = compare(
+            results,
+            json.loads(path.read_text()),
+            args.tolerance,
+            metrics=args.metrics.split(","),
+            min_calls=args.min_calls,
+        )
+        if regressions:
+            print("Regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,10 +1,78 @@
-from fastexec._dep import get_dependant
-from fastexec._exec import FastExec, exec_with_dependant
-from fastexec.version import get_version
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from fastexec._batch import ExecInput, ExecResult
+    from fastexec._cache import CachePolicy, CacheStats
+    from fastexec._dep import DependantCache, get_dependant, warm_up
+    from fastexec._dispatch import Dispatcher
+    from fastexec._errors import ValidationErrors
+    from fastexec._exec import FastExec, exec_with_dependant
+    from fastexec._pool import FastExecPool, WorkerStats
+    from fastexec._rpc import RemoteError, RpcClient, RpcServer, serve_rpc
+    from fastexec._trace import ExecutionTrace, NodeTiming, TraceStats
+
+# Public names and their modules, imported on first access so `import fastexec`
+# does not pay for importing fastapi, starlette and pydantic
+_LAZY_IMPORTS: typing.Dict[typing.Text, typing.Text] = {
+    "get_dependant": "fastexec._dep",
+    "warm_up": "fastexec._dep",
+    "DependantCache": "fastexec._dep",
+    "exec_with_dependant": "fastexec._exec",
+    "FastExec": "fastexec._exec",
+    "FastExecPool": "fastexec._pool",
+    "Dispatcher": "fastexec._dispatch",
+    "WorkerStats": "fastexec._pool",
+    "RpcServer": "fastexec._rpc",
+    "RpcClient": "fastexec._rpc",
+    "RemoteError": "fastexec._rpc",
+    "serve_rpc": "fastexec._rpc",
+    "ValidationErrors": "fastexec._errors",
+    "ExecInput": "fastexec._batch",
+    "ExecResult": "fastexec._batch",
+    "CachePolicy": "fastexec._cache",
+    "CacheStats": "fastexec._cache",
+    "ExecutionTrace": "fastexec._trace",
+    "NodeTiming": "fastexec._trace",
+    "TraceStats": "fastexec._trace",
+}
 
-__version__ = get_version()
 __all__ = [
     "get_dependant",
+    "warm_up",
+    "DependantCache",
     "exec_with_dependant",
     "FastExec",
+    "FastExecPool",
+    "Dispatcher",
+    "WorkerStats",
+    "RpcServer",
+    "RpcClient",
+    "RemoteError",
+    "serve_rpc",
+    "ValidationErrors",
+    "ExecInput",
+    "ExecResult",
+    "CachePolicy",
+    "CacheStats",
+    "ExecutionTrace",
+    "NodeTiming",
+    "TraceStats",
 ]
+
+
+def __getattr__(name: typing.Text) -> typing.Any:
+    if name == "__version__":
+        from fastexec.version import get_version
+
+        value = get_version()
+    elif name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # Later lookups skip `__getattr__`
+    return value
+
+
+def __dir__() -> typing.List[typing.Text]:
+    return [*globals(), *_LAZY_IMPORTS, "__version__"]
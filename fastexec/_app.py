@@ -0,0 +1,22 @@
+import typing
+
+import starlette.datastructures
+
+
+class AppShell:
+    # Lightweight stand-in for `fastapi.FastAPI`, only exposes what dependencies
+    # usually read from `request.app`.
+    def __init__(self, state: typing.Optional[typing.Dict] = None):
+        self.state = starlette.datastructures.State(state if state is not None else {})
+        self.dependency_overrides: typing.Dict[typing.Callable, typing.Callable] = {}
+
+
+def build_app(
+    app: typing.Optional[typing.Any] = None,
+    state: typing.Optional[typing.Dict] = None,
+) -> typing.Any:
+    if app is None:
+        return AppShell(state=state)
+    for _key, _value in (state or {}).items():
+        setattr(app.state, _key, _value)
+    return app
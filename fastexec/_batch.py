@@ -0,0 +1,43 @@
+import dataclasses
+import typing
+
+import pydantic
+
+import fastexec.utils.convert
+
+T = typing.TypeVar("T")
+
+
+class ExecInput(typing.TypedDict, total=False):
+    query_params: typing.Optional[fastexec.utils.convert.JSONObject]
+    headers: typing.Optional[fastexec.utils.convert.JSONObject]
+    body: typing.Optional[typing.Union[typing.Any, pydantic.BaseModel]]
+    state: typing.Optional[typing.Dict]
+    path_params: typing.Optional[typing.Dict[typing.Text, typing.Any]]
+
+
+ExecInputs = typing.Union[typing.Iterable[ExecInput], typing.AsyncIterable[ExecInput]]
+
+
+@dataclasses.dataclass
+class ExecResult(typing.Generic[T]):
+    index: int
+    value: typing.Optional[T] = None
+    error: typing.Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def aenumerate(
+    inputs: ExecInputs,
+) -> typing.AsyncIterator[typing.Tuple[int, ExecInput]]:
+    if isinstance(inputs, typing.AsyncIterable):
+        index = 0
+        async for item in inputs:
+            yield index, item
+            index += 1
+    else:
+        for index, item in enumerate(inputs):
+            yield index, item
@@ -0,0 +1,82 @@
+import collections
+import dataclasses
+import time
+import typing
+
+import starlette.requests
+
+# (request attribute, key) pairs, e.g. `("headers", "authorization")`
+CacheInputs = typing.Sequence[typing.Tuple[typing.Text, typing.Text]]
+
+
+@dataclasses.dataclass(frozen=True)
+class CachePolicy:
+    # Seconds an entry stays valid, None never expires
+    ttl: typing.Optional[float] = None
+    maxsize: int = 128
+    # Extra request inputs to key on, for dependencies reading `request` directly
+    headers: typing.Sequence[typing.Text] = ()
+    query_params: typing.Sequence[typing.Text] = ()
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+
+
+class DependencyCache:
+    # Cross-call cache of one dependency's results, LRU evicted
+    def __init__(self, policy: typing.Optional[CachePolicy] = None):
+        self.policy = policy or CachePolicy()
+        if self.policy.maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {self.policy.maxsize}")
+        self.extra_inputs: CacheInputs = [
+            *(("headers", _name.lower()) for _name in self.policy.headers),
+            *(("query_params", _name) for _name in self.policy.query_params),
+        ]
+        self.hits = 0
+        self.misses = 0
+        self._entries: collections.OrderedDict[
+            typing.Hashable, typing.Tuple[float, typing.Any]
+        ] = collections.OrderedDict()
+
+    def make_key(
+        self, request: starlette.requests.Request, inputs: CacheInputs
+    ) -> typing.Hashable:
+        key = []
+        for source, name in (*inputs, *self.extra_inputs):
+            values = getattr(request, source)
+            if hasattr(values, "getlist"):
+                key.append(tuple(values.getlist(name)))
+            else:
+                key.append(values.get(name))
+        return tuple(key)
+
+    def get(self, key: typing.Hashable) -> typing.Tuple[bool, typing.Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        ttl = self.policy.ttl
+        expires_at = float("inf") if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.policy.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self._entries))
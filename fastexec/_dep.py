@@ -1,10 +1,128 @@
+import collections
+import dataclasses
+import threading
 import typing
 
 import fastapi.dependencies.models
 import fastapi.dependencies.utils
 
+from fastexec._cache import CacheStats
+from fastexec._plan import ExecutionPlan
+
+# ("dependant", call, path) or ("plan", call, path, lifespan calls)
+DependantCacheKey = typing.Tuple[typing.Any, ...]
+
 
 def get_dependant(
     *, path: typing.Text = "/", call: typing.Callable
 ) -> fastapi.dependencies.models.Dependant:
     return fastapi.dependencies.utils.get_dependant(path=path, call=call)
+
+
+def apply_dependency_overrides(
+    dependant: fastapi.dependencies.models.Dependant,
+    overrides: typing.Mapping[typing.Callable, typing.Callable],
+) -> fastapi.dependencies.models.Dependant:
+    # Copy of the tree with overridden sub-dependencies re-analyzed, the way
+    # FastAPI's solver applies `app.dependency_overrides` on every request
+    if not overrides:
+        return dependant
+    dependencies = []
+    for sub_dependant in dependant.dependencies:
+        if sub_dependant.call in overrides:
+            sub_dependant = fastapi.dependencies.utils.get_dependant(
+                path=sub_dependant.path,
+                call=overrides[sub_dependant.call],
+                name=sub_dependant.name,
+                security_scopes=sub_dependant.security_scopes,
+            )
+        dependencies.append(apply_dependency_overrides(sub_dependant, overrides))
+    return dataclasses.replace(dependant, dependencies=dependencies)
+
+
+class DependantCache:
+    # Process-wide cache of analyzed dependants and compiled plans, LRU evicted.
+    # A dependant references its callable, so entries are bounded by size rather
+    # than keyed weakly.
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 0:
+            raise ValueError(f"maxsize must not be negative, got {maxsize}")
+        # 0 disables caching
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: collections.OrderedDict[DependantCacheKey, typing.Any] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get_dependant(
+        self, call: typing.Callable, *, path: typing.Text = "/"
+    ) -> fastapi.dependencies.models.Dependant:
+        return self._get_or_set(
+            ("dependant", call, path), lambda: get_dependant(path=path, call=call)
+        )
+
+    def get_plan(
+        self,
+        call: typing.Callable,
+        *,
+        path: typing.Text = "/",
+        lifespan_calls: typing.Collection[typing.Callable] = (),
+    ) -> typing.Optional[ExecutionPlan]:
+        # Plans mark lifespan nodes, so they are keyed by the lifespan calls too
+        return self._get_or_set(
+            ("plan", call, path, frozenset(lifespan_calls)),
+            lambda: ExecutionPlan.compile(
+                self.get_dependant(call, path=path), lifespan_calls=lifespan_calls
+            ),
+        )
+
+    def warm_up(
+        self, calls: typing.Iterable[typing.Callable], *, path: typing.Text = "/"
+    ) -> None:
+        # Analyzes at startup instead of on the first `FastExec` of each call
+        for call in calls:
+            self.get_plan(call, path=path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self._entries))
+
+    def _get_or_set(
+        self, key: DependantCacheKey, factory: typing.Callable[[], typing.Any]
+    ) -> typing.Any:
+        try:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+        except TypeError:
+            # Unhashable callable, analyzed every time
+            return factory()
+
+        # Analyzed outside the lock, a concurrent miss only repeats the work
+        value = factory()
+        with self._lock:
+            self.misses += 1
+            if self.maxsize:
+                self._entries[key] = value
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+
+DEPENDANT_CACHE = DependantCache()
+
+
+def warm_up(
+    calls: typing.Iterable[typing.Callable], *, path: typing.Text = "/"
+) -> None:
+    DEPENDANT_CACHE.warm_up(calls, path=path)
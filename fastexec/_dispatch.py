@@ -0,0 +1,240 @@
+import typing
+from urllib.parse import parse_qs
+
+import fastapi
+import fastapi.dependencies.models
+import fastapi.routing
+import starlette.routing
+
+import fastexec.utils.convert
+from fastexec._dep import apply_dependency_overrides
+from fastexec._exec import FastExec
+from fastexec._lifespan import LifespanScope
+from fastexec._plan import get_unsupported_reason
+from fastexec._request import ScopeTemplate
+
+# (FastExec of the route, request template of the method, compiled path
+# pattern, path param convertors)
+RouteEntry = typing.Tuple[
+    FastExec,
+    ScopeTemplate,
+    typing.Pattern,
+    typing.Dict[typing.Text, starlette.routing.Convertor],
+]
+
+
+# Options naming dependencies, applied only to the routes having them
+DEPENDENCY_OPTIONS = ("dependency_cache", "executors")
+
+
+def get_dependency_calls(
+    dependant: fastapi.dependencies.models.Dependant,
+) -> typing.List[typing.Callable]:
+    calls: typing.List[typing.Callable] = []
+    stack = list(dependant.dependencies)
+    while stack:
+        sub_dependant = stack.pop()
+        if sub_dependant.call is not None:
+            calls.append(sub_dependant.call)
+        stack.extend(sub_dependant.dependencies)
+    return calls
+
+
+class Dispatcher:
+    # Executes the endpoints of a FastAPI app or router by method and path, in
+    # process, without middleware, HTTP parsing or response serialization
+    def __init__(
+        self,
+        app: typing.Union[fastapi.FastAPI, fastapi.APIRouter],
+        **kwargs,
+    ):
+        self.app = app
+        # Passed to every route's `FastExec`, e.g. `state` or `error_mode`.
+        # Options naming dependencies only go to the routes having them.
+        self.fast_exec_kwargs = kwargs
+        self._overrides: typing.Dict[typing.Callable, typing.Callable] = {}
+        # Lifespan dependencies are entered once for all the routes having them
+        self.lifespan_scope = LifespanScope()
+        # Routes and scope replaced after overrides changed, closed on `exec()`
+        self._retired: typing.List[typing.Union[FastExec, LifespanScope]] = []
+        self._build_routes()
+
+    def _build_routes(self) -> None:
+        overrides = getattr(self.app, "dependency_overrides", None) or {}
+        self._overrides = dict(overrides)
+        # Static paths are looked up directly, paths with params by pattern
+        self.static_routes: typing.Dict[
+            typing.Tuple[typing.Text, typing.Text],
+            typing.Tuple[FastExec, ScopeTemplate],
+        ] = {}
+        self.param_routes: typing.Dict[typing.Text, typing.List[RouteEntry]] = {}
+        for route in self.app.routes:
+            if not isinstance(route, fastapi.routing.APIRoute):
+                continue  # Mounts, websockets and plain starlette routes
+            # The route's dependant also has the router and app dependencies
+            dependant = apply_dependency_overrides(route.dependant, self._overrides)
+            try:
+                fast_exec = FastExec(
+                    call=route.endpoint,
+                    dependant=dependant,
+                    app=self.app if isinstance(self.app, fastapi.FastAPI) else None,
+                    **{
+                        # Applied with the `response` option
+                        "response_model": route.response_model,
+                        "response_model_include": route.response_model_include,
+                        "response_model_exclude": route.response_model_exclude,
+                        "response_model_by_alias": route.response_model_by_alias,
+                        "response_model_exclude_unset": (
+                            route.response_model_exclude_unset
+                        ),
+                        "response_model_exclude_defaults": (
+                            route.response_model_exclude_defaults
+                        ),
+                        "response_model_exclude_none": (
+                            route.response_model_exclude_none
+                        ),
+                        **self._get_route_kwargs(dependant),
+                    },
+                )
+            except ValueError as e:
+                raise ValueError(f"Route {route.path}: {e}") from e
+            # One instance per route, the method is set by the request template
+            for method in route.methods:
+                scope_template = fast_exec.scope_template.for_route(
+                    method=method, path=route.path
+                )
+                if route.param_convertors:
+                    self.param_routes.setdefault(method, []).append(
+                        (
+                            fast_exec,
+                            scope_template,
+                            route.path_regex,
+                            route.param_convertors,
+                        )
+                    )
+                elif not any(
+                    _regex.match(route.path)
+                    for _, _, _regex, _ in self.param_routes.get(method, ())
+                ):
+                    # Unless shadowed by an earlier route, like in FastAPI
+                    self.static_routes.setdefault(
+                        (method, route.path), (fast_exec, scope_template)
+                    )
+
+    def _get_route_kwargs(
+        self, dependant: fastapi.dependencies.models.Dependant
+    ) -> typing.Dict[typing.Text, typing.Any]:
+        kwargs = dict(self.fast_exec_kwargs)
+        calls = get_dependency_calls(dependant)
+        for _option in DEPENDENCY_OPTIONS:
+            if kwargs.get(_option):
+                kwargs[_option] = {
+                    _call: _value
+                    for _call, _value in kwargs[_option].items()
+                    if _call in calls
+                }
+        if kwargs.get("lifespan_dependencies"):
+            kwargs["lifespan_dependencies"] = [
+                _call for _call in kwargs["lifespan_dependencies"] if _call in calls
+            ]
+            kwargs["lifespan_scope"] = self.lifespan_scope
+        if kwargs.get("freeze") and get_unsupported_reason(dependant) is not None:
+            # Only FastAPI's solver can run it, there is no plan to freeze
+            kwargs.pop("freeze")
+        return kwargs
+
+    def match(
+        self, method: typing.Text, path: typing.Text
+    ) -> typing.Tuple[FastExec, typing.Dict[typing.Text, typing.Any]]:
+        fast_exec, _, path_params = self._match(method, path)
+        return fast_exec, path_params
+
+    def _match(
+        self, method: typing.Text, path: typing.Text
+    ) -> typing.Tuple[FastExec, ScopeTemplate, typing.Dict[typing.Text, typing.Any]]:
+        # Routes compiled with overrides that changed since are rebuilt
+        overrides = getattr(self.app, "dependency_overrides", None) or {}
+        if overrides != self._overrides:
+            self._retired.extend(self.iter_fast_execs())
+            self._retired.append(self.lifespan_scope)
+            self.lifespan_scope = LifespanScope()
+            self._build_routes()
+
+        method = method.upper()
+        static_route = self.static_routes.get((method, path))
+        if static_route is not None:
+            return (*static_route, {})
+        for fast_exec, scope_template, path_regex, convertors in self.param_routes.get(
+            method, ()
+        ):
+            matched = path_regex.match(path)
+            if matched is not None:
+                return (
+                    fast_exec,
+                    scope_template,
+                    {
+                        _name: convertors[_name].convert(_value)
+                        for _name, _value in matched.groupdict().items()
+                    },
+                )
+
+        if any(_path == path for _, _path in self.static_routes) or any(
+            _regex.match(path)
+            for _routes in self.param_routes.values()
+            for _, _, _regex, _ in _routes
+        ):
+            raise fastapi.HTTPException(status_code=405, detail="Method Not Allowed")
+        raise fastapi.HTTPException(status_code=404, detail="Not Found")
+
+    async def exec(
+        self,
+        method: typing.Text,
+        path: typing.Text,
+        *,
+        query_params: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        headers: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        body: typing.Optional[typing.Any] = None,
+        state: typing.Optional[typing.Dict] = None,
+        **kwargs,
+    ) -> typing.Any:
+        path, _, query_string = path.partition("?")
+        fast_exec, scope_template, path_params = self._match(method, path)
+        await self._close_retired()
+        if query_string:
+            query_params = {
+                **parse_qs(query_string, keep_blank_values=True),
+                **fastexec.utils.convert.to_query_params(query_params),
+            }
+        return await fast_exec.exec(
+            query_params=query_params,
+            headers=headers,
+            body=body,
+            state=state,
+            path_params=path_params,
+            scope_template=scope_template,
+            **kwargs,
+        )
+
+    async def aclose(self) -> None:
+        await self._close_retired()
+        for fast_exec in self.iter_fast_execs():
+            await fast_exec.aclose()
+        await self.lifespan_scope.aclose()
+
+    async def _close_retired(self) -> None:
+        # Lifespan dependencies and owned executors of replaced routes
+        while self._retired:
+            await self._retired.pop().aclose()
+
+    def iter_fast_execs(self) -> typing.Iterator[FastExec]:
+        # Each route's instance once, whatever its number of methods
+        seen: typing.Set[int] = set()
+        for fast_exec, _ in self.static_routes.values():
+            if id(fast_exec) not in seen:
+                seen.add(id(fast_exec))
+                yield fast_exec
+        for routes in self.param_routes.values():
+            for fast_exec, _, _, _ in routes:
+                if id(fast_exec) not in seen:
+                    seen.add(id(fast_exec))
+                    yield fast_exec
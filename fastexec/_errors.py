@@ -0,0 +1,13 @@
+import typing
+
+# "raise" raises an `HTTPException` on invalid inputs, "return" returns them
+ErrorMode = typing.Literal["raise", "return"]
+
+
+class ValidationErrors(Exception):
+    # Invalid inputs of one execution. Returned rather than raised in the
+    # "return" error mode, so no traceback or message is built.
+    def __init__(self, errors: typing.Sequence[typing.Dict[typing.Text, typing.Any]]):
+        super().__init__(errors)
+        # Pydantic style errors, with "loc", "type", "msg" and "input" keys
+        self.errors = list(errors)
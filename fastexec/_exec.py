@@ -1,23 +1,41 @@
 import asyncio
-import json
+import logging
 import pathlib
+import threading
+import time
 import typing
+import weakref
 from contextlib import AsyncExitStack
-from urllib.parse import urlencode
 
 import fastapi
 import fastapi.dependencies.models
 import fastapi.dependencies.utils
 import fastapi.exceptions
 import pydantic
-import starlette.requests
+from fastapi.dependencies.utils import is_coroutine_callable
 
 import fastexec.utils.convert
 import fastexec.utils.coro
-from fastexec._dep import get_dependant
+from fastexec._app import build_app
+from fastexec._batch import ExecInputs, ExecResult, aenumerate
+from fastexec._cache import CachePolicy, DependencyCache
+from fastexec._dep import DEPENDANT_CACHE
+from fastexec._errors import ErrorMode, ValidationErrors
+from fastexec._lifespan import LifespanScope
+from fastexec._loop import get_background_loop, run_inline
+from fastexec._plan import ExecutionPlan
+from fastexec._request import ScopeTemplate, build_request
+from fastexec._response import ResponseMode, ResponseSerializer
+from fastexec._trace import ExecutionTrace, TraceHook, TraceStats
+from fastexec.utils.codec import JSONCodec, get_codec
+from fastexec.utils.coro import Executor, InlineExecutor, get_executor
+
+logger = logging.getLogger("fastexec")
 
 T = typing.TypeVar("T")
 
+INLINE_EXECUTOR = InlineExecutor()
+
 
 async def exec_with_dependant(
     *,
@@ -26,64 +44,103 @@ async def exec_with_dependant(
     headers: typing.Optional[fastexec.utils.convert.JSONObject] = None,
     body: typing.Optional[typing.Union[typing.Any, pydantic.BaseModel]] = None,
     state: typing.Optional[typing.Dict] = None,
+    path_params: typing.Optional[typing.Dict[typing.Text, typing.Any]] = None,
     app_state: typing.Optional[typing.Dict] = None,
+    app: typing.Optional[typing.Any] = None,
+    plan: typing.Optional[ExecutionPlan] = None,
+    codec: typing.Optional[typing.Union[typing.Text, JSONCodec]] = None,
+    lifespan_scope: typing.Optional[LifespanScope] = None,
+    dependency_caches: typing.Optional[
+        typing.Mapping[typing.Callable, DependencyCache]
+    ] = None,
+    executor: typing.Optional[typing.Union[typing.Text, Executor]] = None,
+    executors: typing.Optional[typing.Mapping[typing.Callable, Executor]] = None,
+    trace: typing.Optional[ExecutionTrace] = None,
+    parallel: bool = False,
+    error_mode: ErrorMode = "raise",
+    fail_fast: bool = False,
+    scope_template: typing.Optional[ScopeTemplate] = None,
+    frozen: typing.Optional[typing.Mapping[int, typing.Any]] = None,
 ) -> typing.Any:
+    _codec = get_codec(codec)
+    _executor = get_executor(executor) if executor is not None else None
 
-    _query_params = fastexec.utils.convert.to_query_params(query_params)
-    _headers = fastexec.utils.convert.to_headers(headers)
-    _body = fastexec.utils.convert.to_body(body)
-    _body_bytes = (
-        json.dumps(_body).encode("utf-8") if isinstance(_body, typing.Dict) else _body
-    )
-
-    # Create a mock app instance
-    app_instance = fastapi.FastAPI()
-    for _key, _value in (app_state or {}).items():
-        setattr(app_instance.state, _key, _value)
-
-    request = starlette.requests.Request(
-        scope={
-            "type": "http",
-            "method": "POST",
-            "path": "/fastexec",
-            "query_string": urlencode(_query_params).encode("utf-8"),
-            "headers": fastexec.utils.convert.dict_to_asgi_headers(_headers),
-            "client": ("127.0.0.1", 8000),
-            "content-length": str(len(_body_bytes)).encode("utf-8"),
-            "state": state or {},
-            "app": app_instance,
-        },
-        receive=lambda: asyncio.Future(),
+    _query_params = fastexec.utils.convert.to_query_params(query_params, codec=_codec)
+    _headers = fastexec.utils.convert.to_headers(headers, codec=_codec)
+    # Converted lazily, only when a dependency reads the body
+    _body = fastexec.utils.convert.LazyBody(
+        body,
+        codec=_codec,
+        content_type=(
+            fastexec.utils.convert.get_header(_headers, "content-type")
+            or (scope_template.content_type if scope_template is not None else None)
+        ),
     )
 
-    # Mock the receive function to return the body
-    async def mock_receive():
-        return {"type": "http.request", "body": _body_bytes, "more_body": False}
+    # Reuse the given app, or fall back to a lightweight app shell
+    app_instance = build_app(app, app_state)
 
-    request._receive = mock_receive
+    request = build_request(
+        query_params=_query_params,
+        headers=_headers,
+        body=_body,
+        state=state,
+        app=app_instance,
+        scope_template=scope_template,
+        path_params=path_params,
+    )
 
+    # The stack spans the endpoint call, yield dependencies stay open until it returns
     async with AsyncExitStack() as stack:
-        solved = await fastapi.dependencies.utils.solve_dependencies(
-            request=request,
-            dependant=dependant,
-            body=_body if isinstance(_body, typing.Dict) else None,
-            async_exit_stack=stack,  # Required
-            embed_body_fields=(
-                False if isinstance(_body, typing.Dict) else True
-            ),  # Required (usually False for non-JSON bodies)
-        )
+        if plan is not None:
+            # Precompiled plan, skips re-walking the dependant tree
+            solved = await plan.solve(
+                request=request,
+                body=_body,
+                async_exit_stack=stack,
+                lifespan_scope=lifespan_scope,
+                dependency_caches=dependency_caches,
+                executor=_executor,
+                executors=executors,
+                trace=trace,
+                parallel=parallel,
+                fail_fast=fail_fast,
+                frozen=frozen,
+            )
+        else:
+            _content = _body.content
+            solved = await fastapi.dependencies.utils.solve_dependencies(
+                request=request,
+                dependant=dependant,
+                body=_content if isinstance(_content, typing.Dict) else None,
+                async_exit_stack=stack,  # Required
+                embed_body_fields=(
+                    False if isinstance(_content, typing.Dict) else True
+                ),  # Required (usually False for non-JSON bodies)
+            )
 
-    # If there were no errors, get the final function’s return by calling the function
-    # with the solved dependency values:
-    if solved.errors:
-        raise fastapi.exceptions.HTTPException(
-            status_code=fastapi.status.HTTP_400_BAD_REQUEST, detail=str(solved.errors)
-        )
+        # If there were no errors, get the final function’s return by calling the
+        # function with the solved dependency values:
+        if solved.errors:
+            if error_mode == "return":
+                return ValidationErrors(solved.errors)
+            raise fastapi.exceptions.HTTPException(
+                status_code=fastapi.status.HTTP_400_BAD_REQUEST,
+                detail=str(solved.errors),
+            )
 
-    # For async functions:
-    final_result = await fastexec.utils.coro.call_any_function(
-        dependant.call, **solved.values
-    )
+        if trace is not None:
+            _started = time.perf_counter()
+        _call_executor = (executors or {}).get(dependant.call, _executor)
+        if _call_executor is not None and not is_coroutine_callable(dependant.call):
+            final_result = await _call_executor.run(dependant.call, solved.values)
+        else:
+            # For async functions:
+            final_result = await fastexec.utils.coro.call_any_function(
+                dependant.call, **solved.values
+            )
+        if trace is not None:
+            trace.record(dependant.call, _started, is_endpoint=True)
     return final_result
 
 
@@ -96,10 +153,143 @@ class FastExec(typing.Generic[T]):
         ],
         *args,
         state: typing.Optional[typing.Dict] = None,
+        app: typing.Optional[fastapi.FastAPI] = None,
+        codec: typing.Optional[typing.Union[typing.Text, JSONCodec]] = None,
+        lifespan_dependencies: typing.Optional[typing.Iterable[typing.Callable]] = None,
+        lifespan_scope: typing.Optional[LifespanScope] = None,
+        hooks: typing.Optional[typing.Iterable[TraceHook]] = None,
+        dependency_cache: typing.Optional[
+            typing.Mapping[typing.Callable, CachePolicy]
+        ] = None,
+        executor: typing.Optional[typing.Union[typing.Text, Executor]] = None,
+        executors: typing.Optional[
+            typing.Mapping[typing.Callable, typing.Union[typing.Text, Executor]]
+        ] = None,
+        parallel: bool = False,
+        error_mode: ErrorMode = "raise",
+        fail_fast: bool = False,
+        default_headers: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        default_query_params: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        dependant: typing.Optional[fastapi.dependencies.models.Dependant] = None,
+        response: typing.Optional[ResponseMode] = None,
+        response_model: typing.Optional[typing.Any] = None,
+        response_model_include: typing.Optional[typing.Any] = None,
+        response_model_exclude: typing.Optional[typing.Any] = None,
+        response_model_by_alias: bool = True,
+        response_model_exclude_unset: bool = False,
+        response_model_exclude_defaults: bool = False,
+        response_model_exclude_none: bool = False,
+        freeze: typing.Optional[typing.Literal["eager", "lazy"]] = None,
         **kwargs,
     ):
-        self.dependant = get_dependant(call=call)
+        if dependant is not None:
+            # Already analyzed, e.g. the dependant of a route
+            self.dependant = dependant
+            self.plan = ExecutionPlan.compile(
+                dependant, lifespan_calls=set(lifespan_dependencies or ())
+            )
+        else:
+            # Analyzed once per callable and shared by every instance
+            self.dependant = DEPENDANT_CACHE.get_dependant(call)
+            # None when the dependant uses features only FastAPI's solver supports
+            self.plan = DEPENDANT_CACHE.get_plan(
+                call, lifespan_calls=set(lifespan_dependencies or ())
+            )
+        self.lifespan_scope: typing.Optional[LifespanScope] = None
+        # A given scope is shared with other instances and closed by its owner
+        self._owns_lifespan_scope = lifespan_scope is None
+        if lifespan_dependencies:
+            if self.plan is None:
+                raise ValueError(
+                    "Lifespan dependencies are not supported by this dependant, "
+                    "it can only be solved by FastAPI's solver"
+                )
+            self.lifespan_scope = lifespan_scope or LifespanScope()
+        self.dependency_caches = {
+            _call: DependencyCache(_policy)
+            for _call, _policy in (dependency_cache or {}).items()
+        }
+        self._validate_dependency_caches()
+        # Executors built here from names are owned, and shut down on `aclose()`
+        self._owned_executors: typing.List[Executor] = []
+        self.executor = self._get_executor(executor)
+        self.executors = {
+            _call: self._get_executor(_executor)
+            for _call, _executor in (executors or {}).items()
+        }
+        # Sibling dependencies are resolved concurrently, level by level
+        self.parallel = parallel
+        if parallel and self.plan is None:
+            logger.debug("Parallel resolution is not supported by FastAPI's solver")
+        # Invalid inputs are raised as an `HTTPException` or returned as
+        # `ValidationErrors`, optionally without solving past the first one
+        self.error_mode: ErrorMode = error_mode
+        self.fail_fast = fail_fast
+        # Whole graph runs synchronously, `exec_sync()` then needs no event loop
+        self.is_sync = (
+            self.plan is not None
+            and self.lifespan_scope is None
+            and not parallel
+            and all(
+                not (_node.is_coroutine or _node.is_gen or _node.is_async_gen)
+                and isinstance(
+                    self.executors.get(_node.call, self.executor or INLINE_EXECUTOR),
+                    InlineExecutor,
+                )
+                for _node in self.plan.nodes
+            )
+        )
+        self.hooks: typing.List[TraceHook] = list(hooks or ())
         self.app_state = state
+        # Built once and shared by every `exec()` call
+        self.app = build_app(app, state)
+        # None follows the module-level default codec at call time
+        self.codec = get_codec(codec) if codec is not None else None
+        # Results as validated models, jsonable objects or JSON bytes, None
+        # returns them as the endpoint does
+        self.response_serializer = (
+            ResponseSerializer(
+                call,
+                response,
+                response_model,
+                include=response_model_include,
+                exclude=response_model_exclude,
+                by_alias=response_model_by_alias,
+                exclude_unset=response_model_exclude_unset,
+                exclude_defaults=response_model_exclude_defaults,
+                exclude_none=response_model_exclude_none,
+            )
+            if response is not None
+            else None
+        )
+        # Request independent dependencies are computed once, when `FastExec` is
+        # created or on the first call, and reused until refreshed
+        if freeze is not None and self.plan is None:
+            raise ValueError(
+                "Freezing dependencies is not supported by this dependant, "
+                "it can only be solved by FastAPI's solver"
+            )
+        self.freeze = freeze
+        self.frozen_values: typing.Optional[typing.Dict[int, typing.Any]] = None
+        # Sync dependencies are frozen under a thread lock, `exec_sync()` may
+        # run without any loop, async ones under a lock per loop
+        self._freeze_lock = threading.Lock()
+        self._freeze_loop_locks: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Lock
+        ] = weakref.WeakKeyDictionary()
+        if freeze == "eager":
+            # Async dependencies wait for the first call, so clients they create
+            # are bound to the loop running the calls
+            self._freeze_sync()
+        # Encoded once, per-call headers and query params are merged in
+        self.scope_template = ScopeTemplate(
+            headers=fastexec.utils.convert.to_headers(
+                default_headers, codec=self.codec
+            ),
+            query_params=fastexec.utils.convert.to_query_params(
+                default_query_params, codec=self.codec
+            ),
+        )
 
     async def exec(
         self,
@@ -110,22 +300,303 @@ class FastExec(typing.Generic[T]):
         state: typing.Optional[typing.Dict] = None,
         **kwargs,
     ) -> T:
-        return await exec_with_dependant(
-            dependant=self.dependant,
+        return await self._exec(
             query_params=query_params,
             headers=headers,
             body=body,
             state=state,
-            app_state=self.app_state,
             **kwargs,
         )
 
+    def exec_sync(
+        self,
+        *,
+        query_params: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        headers: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        body: typing.Optional[typing.Union[typing.Any, pydantic.BaseModel]] = None,
+        state: typing.Optional[typing.Dict] = None,
+        **kwargs,
+    ) -> T:
+        if self.is_sync:
+            # Sync functions are called inline, the coroutine never suspends
+            return run_inline(
+                self._exec(
+                    query_params=query_params,
+                    headers=headers,
+                    body=body,
+                    state=state,
+                    executor=INLINE_EXECUTOR,
+                    **kwargs,
+                )
+            )
+        return get_background_loop().run(
+            self.exec(
+                query_params=query_params,
+                headers=headers,
+                body=body,
+                state=state,
+                **kwargs,
+            )
+        )
+
+    def add_hook(self, hook: TraceHook) -> None:
+        self.hooks.append(hook)
+
+    @property
+    def frozen_nodes(self) -> typing.List[typing.Callable]:
+        # Dependencies whose values are frozen, once computed
+        if self.freeze is None or self.plan is None:
+            return []
+        return [self.plan.nodes[_i].call for _i in self.plan.static_indexes]
+
+    async def refresh_frozen(self) -> None:
+        assert self.plan is not None
+        self.frozen_values = await self.plan.solve_static(
+            executor=self.executor, executors=self.executors
+        )
+
+    @property
+    def is_frozen(self) -> bool:
+        return self.frozen_values is not None and len(self.frozen_values) == len(
+            self.plan.static_indexes if self.plan is not None else ()
+        )
+
+    def _freeze_sync(self) -> None:
+        assert self.plan is not None
+        with self._freeze_lock:
+            if self.frozen_values is None:
+                # Called in this thread, once, whatever the executor
+                self.frozen_values = run_inline(
+                    self.plan.solve_static(sync_only=True, executor=INLINE_EXECUTOR)
+                )
+
+    async def _freeze(self, executor: typing.Optional[Executor]) -> None:
+        assert self.plan is not None
+        self._freeze_sync()
+        if self.is_frozen:
+            return
+        # Only reached with async dependencies, so there is a running loop
+        lock = self._freeze_loop_locks.setdefault(
+            asyncio.get_running_loop(), asyncio.Lock()
+        )
+        async with lock:
+            if not self.is_frozen:
+                self.frozen_values = await self.plan.solve_static(
+                    frozen=self.frozen_values,
+                    executor=executor or self.executor,
+                    executors=self.executors,
+                )
+
+    async def _exec(
+        self,
+        *,
+        executor: typing.Optional[Executor] = None,
+        scope_template: typing.Optional[ScopeTemplate] = None,
+        **kwargs,
+    ) -> T:
+        if self.freeze is not None and not self.is_frozen:
+            await self._freeze(executor)
+
+        # Only traced when hooks are registered
+        trace = ExecutionTrace() if self.hooks else None
+        try:
+            result = await exec_with_dependant(
+                dependant=self.dependant,
+                app=self.app,
+                plan=self.plan,
+                codec=self.codec,
+                lifespan_scope=self.lifespan_scope,
+                dependency_caches=self.dependency_caches,
+                executor=executor or self.executor,
+                executors=self.executors,
+                trace=trace,
+                parallel=self.parallel,
+                error_mode=self.error_mode,
+                fail_fast=self.fail_fast,
+                scope_template=scope_template or self.scope_template,
+                frozen=self.frozen_values,
+                **kwargs,
+            )
+        except BaseException as e:
+            if trace is not None:
+                self._emit_trace(trace, error=e)
+            raise
+        if self.response_serializer is not None and not isinstance(
+            result, ValidationErrors
+        ):
+            result = self.response_serializer(result)
+        if trace is not None:
+            self._emit_trace(
+                trace, error=result if isinstance(result, ValidationErrors) else None
+            )
+        return result
+
+    def _emit_trace(
+        self, trace: ExecutionTrace, error: typing.Optional[BaseException] = None
+    ) -> None:
+        trace.finish(error)
+        for hook in self.hooks:
+            try:
+                hook(trace)
+            except Exception:
+                logger.exception(f"Trace hook {hook} failed")
+
+    def invalidate_dependency_cache(
+        self, call: typing.Optional[typing.Callable] = None
+    ) -> None:
+        for _call, _cache in self.dependency_caches.items():
+            if call is None or _call is call:
+                _cache.invalidate()
+
+    def _get_executor(
+        self, executor: typing.Optional[typing.Union[typing.Text, Executor]]
+    ) -> typing.Optional[Executor]:
+        if executor is None:
+            return None
+        _executor = get_executor(executor)
+        if isinstance(executor, typing.Text):
+            self._owned_executors.append(_executor)
+        return _executor
+
+    def _validate_dependency_caches(self) -> None:
+        if not self.dependency_caches:
+            return
+        if self.plan is None:
+            raise ValueError(
+                "Dependency caches are not supported by this dependant, "
+                "it can only be solved by FastAPI's solver"
+            )
+        nodes = {
+            _node.call: _index for _index, _node in enumerate(self.plan.nodes[:-1])
+        }
+        for _call in self.dependency_caches:
+            _name = getattr(_call, "__name__", str(_call))
+            if _call not in nodes:
+                raise ValueError(f"Cached dependency '{_name}' is not a dependency")
+            _node = self.plan.nodes[nodes[_call]]
+            if _node.is_gen or _node.is_async_gen:
+                raise ValueError(
+                    f"Cannot cache yield dependency '{_name}', "
+                    "use `lifespan_dependencies` instead"
+                )
+            if self.plan.node_reads_body[nodes[_call]]:
+                raise ValueError(f"Cannot cache dependency '{_name}' reading the body")
+            if (
+                self.plan.node_reads_request[nodes[_call]]
+                and not self.dependency_caches[_call].extra_inputs
+            ):
+                # Its key would miss what it reads, callers would share entries
+                raise ValueError(
+                    f"Cannot cache dependency '{_name}' reading the request, "
+                    "list the inputs it reads in `CachePolicy.headers` or "
+                    "`CachePolicy.query_params`"
+                )
+
+    async def aclose(self) -> None:
+        # Runs the cleanup of lifespan dependencies, they are entered again on
+        # the next `exec()` call
+        if self.lifespan_scope is not None and self._owns_lifespan_scope:
+            await self.lifespan_scope.aclose()
+        for _executor in self._owned_executors:
+            _executor.shutdown()
+
+    async def __aenter__(self) -> "FastExec[T]":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def exec_many(
+        self,
+        inputs: ExecInputs,
+        *,
+        concurrency: int = 10,
+        ordered: bool = True,
+    ) -> typing.List[ExecResult[T]]:
+        results = [
+            result async for result in self.exec_stream(inputs, concurrency=concurrency)
+        ]
+        # Results are streamed in completion order
+        if ordered:
+            results.sort(key=lambda r: r.index)
+        return results
+
+    async def exec_stream(
+        self,
+        inputs: ExecInputs,
+        *,
+        concurrency: int = 10,
+        ordered: bool = False,
+    ) -> typing.AsyncIterator[ExecResult[T]]:
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+
+        # At most `concurrency` inputs are pulled and not yet yielded, intake
+        # pauses while the consumer is not asking for more results
+        pending: typing.Dict[int, asyncio.Task[ExecResult[T]]] = {}
+        next_index = 0
+        inputs_iter = aenumerate(inputs)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        index, item = await anext(inputs_iter)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending[index] = asyncio.create_task(self._exec_result(index, item))
+
+                if not pending:
+                    return
+                if ordered:
+                    yield await pending.pop(next_index)
+                    next_index += 1
+                else:
+                    done, _ = await asyncio.wait(
+                        pending.values(), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        result = task.result()
+                        del pending[result.index]
+                        yield result
+        finally:
+            for task in pending.values():
+                task.cancel()
+
+    async def _exec_result(
+        self, index: int, item: typing.Mapping[typing.Text, typing.Any]
+    ) -> ExecResult[T]:
+        try:
+            value = await self.exec(**item)
+        except Exception as e:
+            # Captured per item, never aborts the whole batch
+            return ExecResult(index=index, error=e)
+        if isinstance(value, ValidationErrors):
+            return ExecResult(index=index, error=value)
+        return ExecResult(index=index, value=value)
+
     def save_dependant_graph_image(
         self,
         path: typing.Text | pathlib.Path,
         *,
         name: typing.Text = "Dependency Graph",
+        stats: typing.Optional[TraceStats] = None,
     ):
         from fastexec.utils.graph import save_dependant_graph_image
 
-        return save_dependant_graph_image(self.dependant, path, name=name)
+        return save_dependant_graph_image(self.dependant, path, name=name, stats=stats)
+
+    def save_dependant_graph(
+        self,
+        path: typing.Text | pathlib.Path,
+        *,
+        name: typing.Text = "Dependency Graph",
+        stats: typing.Optional[TraceStats] = None,
+        format: typing.Optional[typing.Text] = None,
+    ):
+        from fastexec.utils.graph import save_dependant_graph
+
+        return save_dependant_graph(
+            self.dependant, path, name=name, stats=stats, format=format
+        )
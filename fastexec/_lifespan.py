@@ -0,0 +1,35 @@
+import asyncio
+import typing
+from contextlib import AsyncExitStack
+
+from fastexec._plan import PlanNode, call_node
+from fastexec.utils.coro import Executor
+
+
+class LifespanScope:
+    # Holds dependencies entered once and reused across executions, their
+    # cleanup runs when the scope is closed
+    def __init__(self):
+        self.stack = AsyncExitStack()
+        self.values: typing.Dict[typing.Tuple[typing.Any, ...], typing.Any] = {}
+        self._lock = asyncio.Lock()
+
+    async def enter(
+        self,
+        node: PlanNode,
+        values: typing.Dict[typing.Text, typing.Any],
+        *,
+        executor: typing.Optional[Executor] = None,
+    ) -> typing.Any:
+        async with self._lock:
+            # Concurrent first calls must not enter the dependency twice
+            if node.cache_key not in self.values:
+                self.values[node.cache_key] = await call_node(
+                    node, values, self.stack, executor=executor
+                )
+        return self.values[node.cache_key]
+
+    async def aclose(self) -> None:
+        stack, self.stack = self.stack, AsyncExitStack()
+        self.values.clear()
+        await stack.aclose()
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+import typing
+
+T = typing.TypeVar("T")
+
+
+class BackgroundLoop:
+    # Long-lived event loop on a daemon thread, shared by sync callers so they
+    # don't pay loop creation and teardown per call
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self._run_forever, name="fastexec-loop", daemon=True
+        )
+        self.thread.start()
+
+    def _run_forever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: typing.Coroutine[typing.Any, typing.Any, T]) -> T:
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError("Cannot block on the background loop from itself")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+_background_loop: typing.Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _reset_background_loop() -> None:
+    # A forked child inherits the loop but not its thread, calls on it would
+    # block forever
+    global _background_loop, _background_loop_lock
+    _background_loop = None
+    _background_loop_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_background_loop)
+
+
+def get_background_loop() -> BackgroundLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None or _background_loop.loop.is_closed():
+            _background_loop = BackgroundLoop()
+        return _background_loop
+
+
+def run_inline(coro: typing.Coroutine[typing.Any, typing.Any, T]) -> T:
+    # Drives a coroutine that never suspends, i.e. only awaits sync work,
+    # without any event loop
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended, it can not be run without a loop")
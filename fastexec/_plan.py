@@ -0,0 +1,476 @@
+import asyncio
+import dataclasses
+import logging
+import time
+import typing
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+
+import fastapi
+import fastapi.concurrency
+import fastapi.dependencies.models
+import fastapi.dependencies.utils
+import fastapi.params
+import fastapi.security
+import pydantic
+import starlette.requests
+import starlette.responses
+from starlette.concurrency import run_in_threadpool
+
+import fastexec.utils.convert
+import fastexec.utils.coro
+from fastexec._trace import ExecutionTrace, mark_started
+
+if typing.TYPE_CHECKING:
+    from fastexec._cache import DependencyCache
+    from fastexec._lifespan import LifespanScope
+
+logger = logging.getLogger("fastexec")
+
+# Request attribute holding each kind of non-body param
+PARAM_SOURCES: typing.Dict[typing.Text, typing.Text] = {
+    "path_params": "path_params",
+    "query_params": "query_params",
+    "header_params": "headers",
+    "cookie_params": "cookies",
+}
+
+# (request attribute, param alias) pairs read by a node
+NodeInputs = typing.Tuple[typing.Tuple[typing.Text, typing.Text], ...]
+
+
+@dataclasses.dataclass
+class PlanNode:
+    call: typing.Callable[..., typing.Any]
+    cache_key: typing.Tuple[typing.Any, ...]
+    is_coroutine: bool
+    is_gen: bool
+    is_async_gen: bool
+    # (fields, request attribute) pairs, e.g. `(query fields, "query_params")`
+    param_extractors: typing.Tuple[typing.Tuple[typing.List, typing.Text], ...]
+    body_params: typing.List
+    # Model type of a single body param, given models of it are passed through
+    body_model: typing.Optional[typing.Type[pydantic.BaseModel]]
+    # (param name, index of the node providing the value) pairs
+    sub_dependencies: typing.Tuple[typing.Tuple[typing.Optional[typing.Text], int], ...]
+    request_param_names: typing.Tuple[typing.Text, ...] = ()
+    background_tasks_param_name: typing.Optional[typing.Text] = None
+    response_param_name: typing.Optional[typing.Text] = None
+    security_scopes_param_name: typing.Optional[typing.Text] = None
+    security_scopes: typing.Optional[typing.List[typing.Text]] = None
+    # Entered once and reused by every execution, see `LifespanScope`
+    lifespan: bool = False
+
+    @classmethod
+    def from_dependant(
+        cls,
+        dependant: fastapi.dependencies.models.Dependant,
+        sub_dependencies: typing.Tuple[
+            typing.Tuple[typing.Optional[typing.Text], int], ...
+        ],
+    ) -> "PlanNode":
+        call = typing.cast(typing.Callable[..., typing.Any], dependant.call)
+        return cls(
+            call=call,
+            cache_key=dependant.cache_key,
+            is_coroutine=fastapi.dependencies.utils.is_coroutine_callable(call),
+            is_gen=fastapi.dependencies.utils.is_gen_callable(call),
+            is_async_gen=fastapi.dependencies.utils.is_async_gen_callable(call),
+            param_extractors=tuple(
+                (getattr(dependant, _params), _source)
+                for _params, _source in PARAM_SOURCES.items()
+                if getattr(dependant, _params)
+            ),
+            body_params=dependant.body_params,
+            body_model=(
+                dependant.body_params[0].type_
+                if len(dependant.body_params) == 1
+                and isinstance(dependant.body_params[0].type_, type)
+                and issubclass(dependant.body_params[0].type_, pydantic.BaseModel)
+                else None
+            ),
+            sub_dependencies=sub_dependencies,
+            request_param_names=tuple(
+                _name
+                for _name in (
+                    dependant.request_param_name,
+                    dependant.http_connection_param_name,
+                )
+                if _name
+            ),
+            background_tasks_param_name=dependant.background_tasks_param_name,
+            response_param_name=dependant.response_param_name,
+            security_scopes_param_name=dependant.security_scopes_param_name,
+            security_scopes=dependant.security_scopes,
+        )
+
+
+def get_unsupported_reason(
+    dependant: fastapi.dependencies.models.Dependant,
+) -> typing.Optional[typing.Text]:
+    if dependant.websocket_param_name:
+        return f"websocket param '{dependant.websocket_param_name}'"
+    for _field in dependant.body_params:
+        if isinstance(_field.field_info, fastapi.params.Form):
+            return f"form/file body param '{_field.name}'"
+    for _sub_dependant in dependant.dependencies:
+        _reason = get_unsupported_reason(_sub_dependant)
+        if _reason is not None:
+            return _reason
+    return None
+
+
+class ExecutionPlan:
+    def __init__(self, nodes: typing.List[PlanNode]):
+        # Topologically ordered, the last node is the endpoint itself
+        self.nodes = nodes
+        self.param_sources = {
+            _source for _node in nodes for _, _source in _node.param_extractors
+        }
+        self.lifespan_indexes = [_i for _i, _n in enumerate(nodes) if _n.lifespan]
+        # Request inputs read by each node and its sub-dependencies
+        self.node_inputs: typing.List[NodeInputs] = []
+        self.node_reads_body: typing.List[bool] = []
+        # Nodes given the request object itself, which any input may be read from
+        self.node_reads_request: typing.List[bool] = []
+        for node in nodes:
+            inputs = {
+                (_source, _field.alias)
+                for _fields, _source in node.param_extractors
+                for _field in _fields
+            }
+            reads_body = bool(node.body_params)
+            reads_request = bool(node.request_param_names)
+            for _, sub_index in node.sub_dependencies:
+                inputs.update(self.node_inputs[sub_index])
+                reads_body = reads_body or self.node_reads_body[sub_index]
+                reads_request = reads_request or self.node_reads_request[sub_index]
+            self.node_inputs.append(tuple(sorted(inputs)))
+            self.node_reads_body.append(reads_body)
+            self.node_reads_request.append(reads_request)
+
+        # Dependencies reading nothing from the request, directly or through
+        # their sub-dependencies, their values can be computed once and frozen
+        node_static: typing.List[bool] = []
+        for node in nodes:
+            node_static.append(
+                not (
+                    node.param_extractors
+                    or node.body_params
+                    or node.request_param_names
+                    or node.background_tasks_param_name
+                    or node.response_param_name
+                    or node.security_scopes_param_name
+                    # Yield dependencies are torn down after every call
+                    or node.is_gen
+                    or node.is_async_gen
+                    or node.lifespan
+                )
+                and all(node_static[_i] for _, _i in node.sub_dependencies)
+            )
+        self.static_indexes = [_i for _i, _s in enumerate(node_static[:-1]) if _s]
+        # Static nodes with only sync functions in their subgraph, they can be
+        # solved without any event loop
+        node_sync: typing.List[bool] = []
+        for node in nodes:
+            node_sync.append(
+                not node.is_coroutine
+                and all(node_sync[_i] for _, _i in node.sub_dependencies)
+            )
+        self.sync_static_indexes = [_i for _i in self.static_indexes if node_sync[_i]]
+
+        # Nodes in solving order, one at a time or grouped by DAG level: nodes of
+        # a level only depend on nodes of lower levels, the endpoint comes last
+        self.sequence = [[_i] for _i in range(len(nodes))]
+        node_levels: typing.List[int] = []
+        for node in nodes:
+            node_levels.append(
+                1
+                + max((node_levels[_i] for _, _i in node.sub_dependencies), default=-1)
+            )
+        self.levels: typing.List[typing.List[int]] = [
+            [] for _ in range(max(node_levels[:-1], default=-1) + 1)
+        ]
+        for index, level in enumerate(node_levels[:-1]):
+            self.levels[level].append(index)
+        self.levels.append([len(nodes) - 1])
+
+    def get_needed_nodes(self, resolved: typing.Collection[int]) -> typing.List[bool]:
+        # Sub-dependencies used only by already resolved nodes can be skipped
+        needed = [False] * len(self.nodes)
+        needed[-1] = True
+        for index in range(len(self.nodes) - 1, -1, -1):
+            if needed[index] and index not in resolved:
+                for _, sub_index in self.nodes[index].sub_dependencies:
+                    needed[sub_index] = True
+        return needed
+
+    @classmethod
+    def compile(
+        cls,
+        dependant: fastapi.dependencies.models.Dependant,
+        *,
+        lifespan_calls: typing.Collection[typing.Callable] = (),
+    ) -> typing.Optional["ExecutionPlan"]:
+        reason = get_unsupported_reason(dependant)
+        if reason is not None:
+            logger.debug(f"Falling back to FastAPI solver, unsupported {reason}")
+            return None
+
+        nodes: typing.List[PlanNode] = []
+        node_index: typing.Dict[typing.Tuple[typing.Any, ...], int] = {}
+
+        def add_node(dep: fastapi.dependencies.models.Dependant) -> int:
+            sub_dependencies = []
+            for sub_dep in dep.dependencies:
+                if sub_dep.use_cache and sub_dep.cache_key in node_index:
+                    sub_index = node_index[sub_dep.cache_key]
+                else:
+                    sub_index = add_node(sub_dep)
+                sub_dependencies.append((sub_dep.name, sub_index))
+            node = PlanNode.from_dependant(dep, tuple(sub_dependencies))
+            node.lifespan = dep is not dependant and dep.call in lifespan_calls
+            nodes.append(node)
+            node_index.setdefault(dep.cache_key, len(nodes) - 1)
+            return len(nodes) - 1
+
+        add_node(dependant)
+        return cls(nodes)
+
+    async def solve(
+        self,
+        *,
+        request: starlette.requests.Request,
+        body: fastexec.utils.convert.LazyBody,
+        async_exit_stack: AsyncExitStack,
+        lifespan_scope: typing.Optional["LifespanScope"] = None,
+        dependency_caches: typing.Optional[
+            typing.Mapping[typing.Callable, "DependencyCache"]
+        ] = None,
+        executor: typing.Optional[fastexec.utils.coro.Executor] = None,
+        executors: typing.Optional[
+            typing.Mapping[typing.Callable, fastexec.utils.coro.Executor]
+        ] = None,
+        trace: typing.Optional[ExecutionTrace] = None,
+        parallel: bool = False,
+        fail_fast: bool = False,
+        frozen: typing.Optional[typing.Mapping[int, typing.Any]] = None,
+    ) -> fastapi.dependencies.utils.SolvedDependency:
+        sources = {_source: getattr(request, _source) for _source in self.param_sources}
+        response = starlette.responses.Response()
+        del response.headers["content-length"]
+        response.status_code = None  # type: ignore
+        background_tasks: typing.Optional[fastapi.BackgroundTasks] = None
+        results: typing.List[typing.Any] = [None] * len(self.nodes)
+        failed = [False] * len(self.nodes)
+        errors: typing.List[typing.Any] = []
+        values: typing.Dict[typing.Text, typing.Any] = {}
+        last_index = len(self.nodes) - 1
+
+        # Values known before solving, frozen ones, from the lifespan scope or
+        # from cross-call caches
+        resolved: typing.Dict[int, typing.Any] = dict(frozen) if frozen else {}
+        cache_keys: typing.Dict[int, typing.Hashable] = {}
+        if lifespan_scope is not None:
+            for index in self.lifespan_indexes:
+                if self.nodes[index].cache_key in lifespan_scope.values:
+                    resolved[index] = lifespan_scope.values[self.nodes[index].cache_key]
+        if dependency_caches:
+            for index, node in enumerate(self.nodes[:-1]):
+                cache = dependency_caches.get(node.call)
+                if cache is None or index in resolved:
+                    continue
+                cache_keys[index] = cache.make_key(request, self.node_inputs[index])
+                hit, value = cache.get(cache_keys[index])
+                if hit:
+                    resolved[index] = value
+        needed = self.get_needed_nodes(resolved) if resolved else None
+
+        async def run(index: int, values: typing.Dict[typing.Text, typing.Any]):
+            node = self.nodes[index]
+            node_executor = (
+                executors.get(node.call, executor) if executors else executor
+            )
+            if trace is not None:
+                node_started = time.perf_counter()
+                thread_started: typing.List[float] = []
+            if node.lifespan and lifespan_scope is not None:
+                results[index] = await lifespan_scope.enter(
+                    node, values, executor=node_executor
+                )
+            else:
+                results[index] = await call_node(
+                    node,
+                    values,
+                    async_exit_stack,
+                    executor=node_executor,
+                    started=thread_started if trace is not None else None,
+                )
+            if trace is not None:
+                trace.record(
+                    node.call,
+                    node_started,
+                    thread_started=thread_started[0] if thread_started else None,
+                )
+            if index in cache_keys:
+                dependency_caches[node.call].set(cache_keys[index], results[index])
+
+        # One group at a time, the nodes of a group are called concurrently
+        for group in self.levels if parallel else self.sequence:
+            runnable: typing.List[typing.Tuple[int, typing.Dict]] = []
+            for index in group:
+                node = self.nodes[index]
+                if index in resolved:
+                    results[index] = resolved[index]
+                    if trace is not None:
+                        trace.record(node.call, time.perf_counter(), cache_hit=True)
+                    continue
+                elif needed is not None and not needed[index]:
+                    continue
+
+                values = {}
+                node_failed = False
+                for name, sub_index in node.sub_dependencies:
+                    if failed[sub_index]:
+                        node_failed = True
+                    elif name is not None:
+                        values[name] = results[sub_index]
+
+                for fields, source in node.param_extractors:
+                    _values, _errors = (
+                        fastapi.dependencies.utils.request_params_to_args(
+                            fields, sources[source]
+                        )
+                    )
+                    values.update(_values)
+                    if _errors:
+                        errors.extend(_errors)
+                        node_failed = True
+                        if fail_fast:
+                            break
+                if node.body_model is not None and isinstance(
+                    body.model, node.body_model
+                ):
+                    # Already a validated model, no dump and re-validation
+                    values[node.body_params[0].name] = body.model
+                elif node.body_params and not (fail_fast and node_failed):
+                    content = body.content
+                    _values, _errors = (
+                        await fastapi.dependencies.utils.request_body_to_args(
+                            body_fields=node.body_params,
+                            received_body=(
+                                content if isinstance(content, dict) else None
+                            ),
+                            embed_body_fields=not isinstance(content, dict),
+                        )
+                    )
+                    values.update(_values)
+                    if _errors:
+                        errors.extend(_errors)
+                        node_failed = True
+
+                for name in node.request_param_names:
+                    values[name] = request
+                if node.background_tasks_param_name:
+                    if background_tasks is None:
+                        background_tasks = fastapi.BackgroundTasks()
+                    values[node.background_tasks_param_name] = background_tasks
+                if node.response_param_name:
+                    values[node.response_param_name] = response
+                if node.security_scopes_param_name:
+                    values[node.security_scopes_param_name] = (
+                        fastapi.security.SecurityScopes(scopes=node.security_scopes)
+                    )
+
+                if node_failed:
+                    failed[index] = True
+                    if fail_fast:
+                        break
+                    continue
+                if index == last_index:
+                    break  # The endpoint itself is called by the caller
+                runnable.append((index, values))
+
+            if fail_fast and errors:
+                # Stops at the first invalid input, nothing else is solved
+                break
+
+            if len(runnable) == 1:
+                await run(*runnable[0])
+            elif runnable:
+                try:
+                    async with asyncio.TaskGroup() as task_group:
+                        for index, node_values in runnable:
+                            task_group.create_task(run(index, node_values))
+                except BaseExceptionGroup as e:
+                    # Surface the dependency's own error, like sequential solving
+                    raise e.exceptions[0]
+
+        return fastapi.dependencies.utils.SolvedDependency(
+            values=values,
+            errors=errors,
+            background_tasks=background_tasks,
+            response=response,
+            dependency_cache={},
+        )
+
+    async def solve_static(
+        self,
+        *,
+        sync_only: bool = False,
+        frozen: typing.Optional[typing.Mapping[int, typing.Any]] = None,
+        executor: typing.Optional[fastexec.utils.coro.Executor] = None,
+        executors: typing.Optional[
+            typing.Mapping[typing.Callable, fastexec.utils.coro.Executor]
+        ] = None,
+    ) -> typing.Dict[int, typing.Any]:
+        # Values of the request independent nodes, by node index, the `frozen`
+        # ones are kept as they are
+        results: typing.Dict[int, typing.Any] = dict(frozen) if frozen else {}
+        async with AsyncExitStack() as stack:  # Unused, static nodes never yield
+            for index in self.sync_static_indexes if sync_only else self.static_indexes:
+                if index in results:
+                    continue
+                node = self.nodes[index]
+                results[index] = await call_node(
+                    node,
+                    {
+                        _name: results[_sub_index]
+                        for _name, _sub_index in node.sub_dependencies
+                        if _name is not None
+                    },
+                    stack,
+                    executor=(
+                        executors.get(node.call, executor) if executors else executor
+                    ),
+                )
+        return results
+
+
+async def call_node(
+    node: PlanNode,
+    values: typing.Dict[typing.Text, typing.Any],
+    async_exit_stack: AsyncExitStack,
+    executor: typing.Optional[fastexec.utils.coro.Executor] = None,
+    started: typing.Optional[typing.List[float]] = None,
+) -> typing.Any:
+    if node.is_gen:
+        return await async_exit_stack.enter_async_context(
+            fastapi.concurrency.contextmanager_in_threadpool(
+                contextmanager(node.call)(**values)
+            )
+        )
+    elif node.is_async_gen:
+        return await async_exit_stack.enter_async_context(
+            asynccontextmanager(node.call)(**values)
+        )
+    elif node.is_coroutine:
+        return await node.call(**values)
+
+    call = node.call
+    if started is not None and not isinstance(
+        executor, fastexec.utils.coro.ProcessPoolExecutor
+    ):
+        call = mark_started(call, started)
+    if executor is not None:
+        return await executor.run(call, values)
+    return await run_in_threadpool(call, **values)
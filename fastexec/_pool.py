@@ -0,0 +1,243 @@
+import concurrent.futures
+import dataclasses
+import importlib
+import itertools
+import multiprocessing
+import os
+import time
+import typing
+
+import starlette.exceptions
+
+import fastexec.utils.convert
+from fastexec._batch import ExecInput, ExecResult
+from fastexec._errors import ValidationErrors
+
+T = typing.TypeVar("T")
+
+# Per-process state of a worker, set up once by `init_worker()`
+_worker_exec: typing.Optional[typing.Any] = None
+
+
+@dataclasses.dataclass
+class WorkerStats:
+    pid: int
+    executions: int = 0
+    errors: int = 0
+    # Seconds spent executing, excluding the time waiting for inputs
+    busy_time: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        # Executions per busy second
+        return self.executions / self.busy_time if self.busy_time else 0.0
+
+
+@dataclasses.dataclass
+class ErrorPayload:
+    # An error as plain data, since exceptions may not pickle with their
+    # arguments or attributes, e.g. `HTTPException` loses its `status_code`
+    type_path: typing.Text
+    message: typing.Text
+    args: typing.List[typing.Any]
+    status_code: typing.Optional[int] = None
+    detail: typing.Any = None
+    headers: typing.Optional[typing.Dict[typing.Text, typing.Text]] = None
+
+    @classmethod
+    def from_error(cls, e: BaseException) -> "ErrorPayload":
+        type_path = f"{type(e).__module__}:{type(e).__qualname__}"
+        if isinstance(e, starlette.exceptions.HTTPException):
+            return cls(
+                type_path=type_path,
+                message=str(e),
+                args=[],
+                status_code=e.status_code,
+                detail=fastexec.utils.convert.to_jsonable(e.detail),
+                headers=dict(e.headers) if e.headers else None,
+            )
+        return cls(
+            type_path=type_path,
+            message=str(e),
+            args=fastexec.utils.convert.to_jsonable(list(e.args)),
+        )
+
+    def to_error(self) -> BaseException:
+        try:
+            error_cls = import_from_path(self.type_path)
+            if self.status_code is not None:
+                return error_cls(
+                    status_code=self.status_code,
+                    detail=self.detail,
+                    headers=self.headers,
+                )
+            return error_cls(*self.args)
+        except Exception:
+            # Types the parent can not import or build are sent back as text
+            return RuntimeError(f"{self.type_path.rpartition(':')[2]}: {self.message}")
+
+
+def get_import_path(call: typing.Union[typing.Text, typing.Callable]) -> typing.Text:
+    if isinstance(call, str):
+        return call
+    module, qualname = getattr(call, "__module__", None), call.__qualname__
+    if not module or module == "__main__" or "<locals>" in qualname:
+        raise ValueError(
+            f"{call!r} can not be imported by worker processes, define it at "
+            "module level or pass its import path, e.g. 'package.module:function'"
+        )
+    return f"{module}:{qualname}"
+
+
+def import_from_path(path: typing.Text) -> typing.Any:
+    # "package.module:attr.attr" or "package.module.attr"
+    module_name, _, qualname = path.partition(":")
+    if not qualname:
+        module_name, _, qualname = path.rpartition(".")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def init_worker(
+    call_path: typing.Text,
+    initializer_path: typing.Optional[typing.Text],
+    initargs: typing.Tuple,
+    fast_exec_kwargs: typing.Dict[typing.Text, typing.Any],
+) -> None:
+    from fastexec._exec import FastExec
+
+    global _worker_exec
+    # Built once per worker, from objects that never cross the process boundary
+    state = None
+    if initializer_path is not None:
+        state = import_from_path(initializer_path)(*initargs)
+    _worker_exec = FastExec(
+        call=import_from_path(call_path), state=state, **fast_exec_kwargs
+    )
+
+
+def run_chunk(
+    chunk: typing.List[typing.Tuple[int, ExecInput]],
+) -> typing.Tuple[WorkerStats, typing.List[ExecResult]]:
+    assert _worker_exec is not None, "Worker is not initialized"
+    stats = WorkerStats(pid=os.getpid())
+    results: typing.List[ExecResult] = []
+    started = time.perf_counter()
+    for index, item in chunk:
+        try:
+            value = _worker_exec.exec_sync(**item)
+            if isinstance(value, ValidationErrors):
+                raise value
+            results.append(ExecResult(index=index, value=value))
+        except Exception as e:
+            stats.errors += 1
+            # Rebuilt into an exception by `FastExecPool.map()`
+            results.append(
+                ExecResult(index=index, error=ErrorPayload.from_error(e))  # type: ignore
+            )
+    stats.executions = len(chunk)
+    stats.busy_time = time.perf_counter() - started
+    return stats, results
+
+
+class FastExecPool(typing.Generic[T]):
+    # Runs a FastExec callable in worker processes, for CPU-bound functions the
+    # GIL keeps on one core. The callable and initializer are shipped by import
+    # path and each worker builds its own `FastExec` once.
+    def __init__(
+        self,
+        call: typing.Union[typing.Text, typing.Callable[..., T]],
+        *,
+        processes: typing.Optional[int] = None,
+        initializer: typing.Optional[typing.Union[typing.Text, typing.Callable]] = None,
+        initargs: typing.Tuple = (),
+        mp_context: typing.Optional[typing.Any] = None,
+        **kwargs,
+    ):
+        self.call_path = get_import_path(call)
+        self.initializer_path = (
+            get_import_path(initializer) if initializer is not None else None
+        )
+        self.processes = processes or os.cpu_count() or 1
+        self.worker_stats: typing.Dict[int, WorkerStats] = {}
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=mp_context or multiprocessing.get_context(),
+            initializer=init_worker,
+            initargs=(self.call_path, self.initializer_path, initargs, kwargs),
+        )
+
+    def map(
+        self,
+        inputs: typing.Iterable[ExecInput],
+        *,
+        chunksize: int = 16,
+        ordered: bool = False,
+    ) -> typing.Iterator[ExecResult[T]]:
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+
+        # Inputs go out in chunks to amortize pickling and IPC, with two chunks
+        # per worker in flight so intake follows the consumer
+        items = enumerate(inputs)
+        chunks = iter(lambda: list(itertools.islice(items, chunksize)), [])
+        pending: typing.Set[concurrent.futures.Future] = set()
+        buffered: typing.Dict[int, ExecResult[T]] = {}
+        next_index = 0
+        try:
+            while True:
+                for chunk in itertools.islice(
+                    chunks, 2 * self.processes - len(pending)
+                ):
+                    pending.add(self._pool.submit(run_chunk, chunk))
+                if not pending:
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    stats, results = future.result()
+                    self._add_stats(stats)
+                    for result in results:
+                        if isinstance(result.error, ErrorPayload):
+                            result.error = result.error.to_error()
+                    if not ordered:
+                        yield from results
+                        continue
+                    buffered.update((_r.index, _r) for _r in results)
+                    while next_index in buffered:
+                        yield buffered.pop(next_index)
+                        next_index += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def exec_many(
+        self,
+        inputs: typing.Iterable[ExecInput],
+        *,
+        chunksize: int = 16,
+    ) -> typing.List[ExecResult[T]]:
+        return list(self.map(inputs, chunksize=chunksize, ordered=True))
+
+    def stats(self) -> typing.List[WorkerStats]:
+        return sorted(self.worker_stats.values(), key=lambda s: s.pid)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "FastExecPool[T]":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _add_stats(self, chunk_stats: WorkerStats) -> None:
+        stats = self.worker_stats.setdefault(
+            chunk_stats.pid, WorkerStats(pid=chunk_stats.pid)
+        )
+        stats.executions += chunk_stats.executions
+        stats.errors += chunk_stats.errors
+        stats.busy_time += chunk_stats.busy_time
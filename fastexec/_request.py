@@ -0,0 +1,158 @@
+import copy
+import typing
+from urllib.parse import urlencode
+
+import starlette.requests
+
+import fastexec.utils.convert
+
+
+class ExecRequest(starlette.requests.Request):
+    # Request reading its body from a `LazyBody`, bytes are only produced when
+    # `body()`/`stream()` is awaited and `json()` skips parsing them back.
+    # `stream()` yields binary bodies in chunks, without reading them whole.
+    def __init__(
+        self,
+        scope: typing.MutableMapping[typing.Text, typing.Any],
+        body: fastexec.utils.convert.LazyBody,
+    ):
+        chunks: typing.Optional[typing.Iterator[bytes]] = None
+        next_chunk: typing.Optional[bytes] = None
+
+        async def receive():
+            # Body chunks are read from the source as the request is streamed
+            nonlocal chunks, next_chunk
+            if chunks is None:
+                chunks = body.iter_chunks()
+                next_chunk = next(chunks, b"")
+            chunk, next_chunk = next_chunk, next(chunks, None)
+            if chunk is None:
+                return {"type": "http.disconnect"}
+            return {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": next_chunk is not None,
+            }
+
+        super().__init__(scope, receive=receive)
+        self.lazy_body = body
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            if self._stream_consumed:
+                raise RuntimeError("Stream consumed")
+            # Straight from the source, `bytes` bodies are not copied
+            self._body = self.lazy_body.raw
+        return self._body
+
+    async def json(self) -> typing.Any:
+        if not hasattr(self, "_json"):
+            content = self.lazy_body.content
+            if isinstance(content, bytes):
+                content = self.lazy_body.codec.loads(await self.body())
+            self._json = content
+        return self._json
+
+
+class ScopeTemplate:
+    # Default headers and query params encoded once, per-call values are merged
+    # in and replace defaults of the same name
+    def __init__(
+        self,
+        *,
+        headers: typing.Optional[fastexec.utils.convert.Headers] = None,
+        query_params: typing.Optional[fastexec.utils.convert.QueryParams] = None,
+        method: typing.Text = "POST",
+        path: typing.Text = "/fastexec",
+    ):
+        self.headers = fastexec.utils.convert.dict_to_asgi_headers(headers or {})
+        self.header_names = {_name for _name, _ in self.headers}
+        self.query_params = dict(query_params or {})
+        self.query_string = urlencode(self.query_params, doseq=True).encode("utf-8")
+        self.content_type = fastexec.utils.convert.get_header(
+            headers or {}, "content-type"
+        )
+        self.scope: typing.Dict[typing.Text, typing.Any] = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "client": ("127.0.0.1", 8000),
+        }
+
+    def for_route(self, *, method: typing.Text, path: typing.Text) -> "ScopeTemplate":
+        template = copy.copy(self)
+        template.scope = {**self.scope, "method": method, "path": path}
+        return template
+
+    def build_scope(
+        self,
+        *,
+        query_params: fastexec.utils.convert.QueryParams,
+        headers: fastexec.utils.convert.Headers,
+        state: typing.Optional[typing.Dict],
+        app: typing.Any,
+        path_params: typing.Optional[typing.Dict[typing.Text, typing.Any]] = None,
+    ) -> typing.Dict[typing.Text, typing.Any]:
+        return {
+            **self.scope,
+            "query_string": self.get_query_string(query_params),
+            "headers": self.get_headers(headers),
+            "state": state or {},
+            "app": app,
+            "path_params": path_params or {},
+        }
+
+    def get_headers(
+        self, headers: fastexec.utils.convert.Headers
+    ) -> typing.List[typing.Tuple[bytes, bytes]]:
+        if not headers:
+            return self.headers  # Read-only in requests, shared across calls
+        call_headers = fastexec.utils.convert.dict_to_asgi_headers(headers)
+        if not self.headers:
+            return call_headers
+        names = {_name for _name, _ in call_headers}
+        if names.isdisjoint(self.header_names):
+            return call_headers + self.headers
+        return call_headers + [_h for _h in self.headers if _h[0] not in names]
+
+    def get_query_string(
+        self, query_params: fastexec.utils.convert.QueryParams
+    ) -> bytes:
+        if not query_params:
+            return self.query_string
+        elif not self.query_params:
+            return urlencode(query_params, doseq=True).encode("utf-8")
+        elif self.query_params.keys().isdisjoint(query_params):
+            return (
+                self.query_string
+                + b"&"
+                + urlencode(query_params, doseq=True).encode("utf-8")
+            )
+        return urlencode({**self.query_params, **query_params}, doseq=True).encode(
+            "utf-8"
+        )
+
+
+EMPTY_SCOPE_TEMPLATE = ScopeTemplate()
+
+
+def build_request(
+    *,
+    query_params: fastexec.utils.convert.QueryParams,
+    headers: fastexec.utils.convert.Headers,
+    body: fastexec.utils.convert.LazyBody,
+    state: typing.Optional[typing.Dict],
+    app: typing.Any,
+    scope_template: typing.Optional[ScopeTemplate] = None,
+    path_params: typing.Optional[typing.Dict[typing.Text, typing.Any]] = None,
+) -> ExecRequest:
+    return ExecRequest(
+        scope=(scope_template or EMPTY_SCOPE_TEMPLATE).build_scope(
+            query_params=query_params,
+            headers=headers,
+            state=state,
+            app=app,
+            path_params=path_params,
+        ),
+        body=body,
+    )
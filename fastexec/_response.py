@@ -0,0 +1,93 @@
+import functools
+import typing
+
+import fastapi.dependencies.utils
+import fastapi.exceptions
+import pydantic
+
+# "model" returns validated models, "jsonable" JSON compatible Python objects
+# and "json" encoded JSON bytes, straight from pydantic-core
+ResponseMode = typing.Literal["model", "jsonable", "json"]
+
+
+@functools.lru_cache(maxsize=256)
+def get_type_adapter(response_model: typing.Any) -> pydantic.TypeAdapter:
+    # Building the core schema is the expensive part, done once per type
+    return pydantic.TypeAdapter(response_model)
+
+
+def prepare_response_content(value: typing.Any, **dump_options) -> typing.Any:
+    # Models as dicts, so validation builds the response model itself rather
+    # than keeping subclass instances with extra fields, like FastAPI does
+    if isinstance(value, pydantic.BaseModel):
+        return value.model_dump(
+            by_alias=True,
+            exclude_unset=dump_options.get("exclude_unset", False),
+            exclude_defaults=dump_options.get("exclude_defaults", False),
+            exclude_none=dump_options.get("exclude_none", False),
+        )
+    elif isinstance(value, list):
+        return [prepare_response_content(_v, **dump_options) for _v in value]
+    elif isinstance(value, dict):
+        return {
+            _k: prepare_response_content(_v, **dump_options) for _k, _v in value.items()
+        }
+    return value
+
+
+class ResponseSerializer:
+    # Applies a response model to endpoint results, like FastAPI does before
+    # sending a response
+    def __init__(
+        self,
+        call: typing.Callable,
+        mode: ResponseMode,
+        response_model: typing.Optional[typing.Any] = None,
+        *,
+        include: typing.Optional[typing.Any] = None,
+        exclude: typing.Optional[typing.Any] = None,
+        by_alias: bool = True,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+    ):
+        if mode not in typing.get_args(ResponseMode):
+            raise ValueError(
+                f"Unknown response mode: {mode}, "
+                f"expected one of {typing.get_args(ResponseMode)}"
+            )
+        if response_model is None:
+            # Same inference as FastAPI routes, from the return annotation
+            response_model = fastapi.dependencies.utils.get_typed_return_annotation(
+                call
+            )
+        self.mode = mode
+        # Without any model results are only encoded
+        self.response_model = typing.Any if response_model is None else response_model
+        self.adapter = get_type_adapter(self.response_model)
+        # Same defaults as the `response_model_*` options of FastAPI routes
+        self.dump_options: typing.Dict[typing.Text, typing.Any] = {
+            "include": include,
+            "exclude": exclude,
+            "by_alias": by_alias,
+            "exclude_unset": exclude_unset,
+            "exclude_defaults": exclude_defaults,
+            "exclude_none": exclude_none,
+        }
+
+    def __call__(self, value: typing.Any) -> typing.Any:
+        if self.mode == "model":
+            # Dumping already filters the other modes by the response model
+            value = prepare_response_content(value, **self.dump_options)
+        try:
+            validated = self.adapter.validate_python(value, from_attributes=True)
+        except pydantic.ValidationError as e:
+            raise fastapi.exceptions.ResponseValidationError(
+                errors=e.errors(include_url=False), body=value
+            ) from e
+        if self.mode == "model":
+            return validated
+        elif self.mode == "jsonable":
+            return self.adapter.dump_python(validated, mode="json", **self.dump_options)
+        # Encoded in one pass, with no intermediate dicts for lists of models
+        return self.adapter.dump_json(validated, **self.dump_options)
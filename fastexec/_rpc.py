@@ -0,0 +1,429 @@
+import asyncio
+import contextlib
+import itertools
+import os
+import struct
+import typing
+
+import fastexec.utils.convert
+from fastexec._batch import ExecInput
+from fastexec._errors import ValidationErrors
+from fastexec.utils.codec import JSONCodec, get_codec
+
+# Frame header: payload length, request id and frame kind
+FRAME_HEADER = struct.Struct(">IIB")
+# Prefix of the request metadata, followed by the raw body if any
+META_LENGTH = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Frame kinds
+REQUEST = 1
+# Request with a binary body sent raw after the metadata, never JSON encoded
+REQUEST_BINARY = 2
+RESULT = 3
+ERROR = 4
+
+RPC_INPUT_KEYS = ("query_params", "headers", "body", "state", "path_params")
+
+
+class RemoteError(Exception):
+    # Exception raised by a callable in the worker, re-raised by the client
+    def __init__(
+        self,
+        type_name: typing.Text,
+        message: typing.Text,
+        *,
+        status_code: typing.Optional[int] = None,
+        detail: typing.Any = None,
+    ):
+        super().__init__(f"{type_name}: {message}")
+        self.type_name = type_name
+        self.message = message
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def read_frame(
+    reader: asyncio.StreamReader, *, max_frame_size: int = MAX_FRAME_SIZE
+) -> typing.Optional[typing.Tuple[int, int, bytes]]:
+    # None when the peer closed the connection between frames
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ConnectionError("Connection closed inside a frame header") from e
+        return None
+    length, request_id, kind = FRAME_HEADER.unpack(header)
+    if length > max_frame_size:
+        raise ConnectionError(f"Frame of {length} bytes exceeds {max_frame_size}")
+    return request_id, kind, await reader.readexactly(length)
+
+
+def write_frame(
+    writer: asyncio.StreamWriter, request_id: int, kind: int, *payload: typing.Any
+) -> None:
+    # One `write()` per frame, frames of concurrent requests never interleave
+    length = sum(len(_part) for _part in payload)
+    writer.write(b"".join((FRAME_HEADER.pack(length, request_id, kind), *payload)))
+
+
+def encode_error(e: BaseException, codec: JSONCodec) -> bytes:
+    if isinstance(e, ValidationErrors):
+        return codec.dumps(
+            {"type": "ValidationErrors", "message": "", "detail": e.errors}
+        )
+    return codec.dumps(
+        {
+            "type": type(e).__name__,
+            "message": str(e),
+            # `HTTPException` and the like
+            "status_code": getattr(e, "status_code", None),
+            "detail": getattr(e, "detail", None),
+        }
+    )
+
+
+def decode_error(payload: bytes, codec: JSONCodec) -> Exception:
+    error = codec.loads(payload)
+    if error["type"] == "ValidationErrors":
+        return ValidationErrors(error["detail"])
+    return RemoteError(
+        error["type"],
+        error["message"],
+        status_code=error.get("status_code"),
+        detail=error.get("detail"),
+    )
+
+
+class RpcServer:
+    # Serves FastExec callables to co-located processes over a Unix socket or
+    # TCP, with length-prefixed frames and many concurrent requests per
+    # connection, without HTTP parsing or routing
+    def __init__(
+        self,
+        calls: typing.Union[
+            typing.Mapping[typing.Text, typing.Callable],
+            typing.Iterable[typing.Callable],
+        ],
+        *,
+        path: typing.Optional[typing.Union[typing.Text, os.PathLike]] = None,
+        host: typing.Text = "127.0.0.1",
+        port: int = 0,
+        codec: typing.Optional[typing.Union[typing.Text, JSONCodec]] = None,
+        max_frame_size: int = MAX_FRAME_SIZE,
+        **kwargs,
+    ):
+        from fastexec._exec import FastExec
+
+        if not isinstance(calls, typing.Mapping):
+            calls = {_call.__name__: _call for _call in calls}
+        # Results are serialized to JSON by the response serializer, unless a
+        # `response` mode is given
+        kwargs.setdefault("response", "json")
+        self.fast_execs: typing.Dict[typing.Text, FastExec] = {
+            _name: FastExec(call=_call, **kwargs) for _name, _call in calls.items()
+        }
+        self.path = os.fspath(path) if path is not None else None
+        self.host = host
+        self.port = port
+        self.codec = get_codec(codec)
+        self.max_frame_size = max_frame_size
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+        self._connections: typing.Set[asyncio.Task] = set()
+
+    @property
+    def address(self) -> typing.Union[typing.Text, typing.Tuple[typing.Text, int]]:
+        # Socket path, or the TCP host and port actually bound
+        if self.path is not None:
+            return self.path
+        if self._server is not None:
+            return self._server.sockets[0].getsockname()[:2]
+        return (self.host, self.port)
+
+    async def start(self) -> None:
+        if self.path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)  # Left over by a previous worker
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=self.path
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, host=self.host, port=self.port
+            )
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for task in self._connections:
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+            if self.path is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.path)
+        for fast_exec in self.fast_execs.values():
+            await fast_exec.aclose()
+
+    async def __aenter__(self) -> "RpcServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = asyncio.current_task()
+        assert connection is not None
+        self._connections.add(connection)
+        requests: typing.Set[asyncio.Task] = set()
+        try:
+            # Every request runs in its own task, responses are sent as they
+            # complete, in any order
+            while (
+                frame := await read_frame(reader, max_frame_size=self.max_frame_size)
+            ) is not None:
+                task = asyncio.create_task(self._handle_request(writer, *frame))
+                requests.add(task)
+                task.add_done_callback(requests.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # Cancelled by `aclose()`, the server is shutting down
+        finally:
+            for task in requests:
+                task.cancel()
+            await asyncio.gather(*requests, return_exceptions=True)
+            self._connections.discard(connection)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _handle_request(
+        self, writer: asyncio.StreamWriter, request_id: int, kind: int, payload: bytes
+    ) -> None:
+        try:
+            (meta_length,) = META_LENGTH.unpack_from(payload)
+            meta_end = META_LENGTH.size + meta_length
+            meta = self.codec.loads(payload[META_LENGTH.size : meta_end])
+            fast_exec = self.fast_execs.get(meta["call"])
+            if fast_exec is None:
+                raise LookupError(f"Unknown call: {meta['call']}")
+            item: ExecInput = {_k: meta[_k] for _k in RPC_INPUT_KEYS if _k in meta}
+            if kind == REQUEST_BINARY:
+                # Other buffers are streamed like locally, `bytes` are still
+                # sniffed for JSON
+                item["body"] = (
+                    memoryview(payload)[meta_end:]
+                    if meta.get("buffer")
+                    else payload[meta_end:]
+                )
+            value = await fast_exec.exec(**item)
+            if isinstance(value, ValidationErrors):
+                raise value
+            if not isinstance(value, bytes):
+                # Other `response` modes, models are sent as their JSON form
+                value = self.codec.dumps(fastexec.utils.convert.to_jsonable(value))
+        except Exception as e:
+            write_frame(writer, request_id, ERROR, encode_error(e, self.codec))
+        else:
+            write_frame(writer, request_id, RESULT, value)
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+
+
+class RpcConnection:
+    # One client connection, requests are matched to responses by id
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        *,
+        codec: JSONCodec,
+        max_frame_size: int = MAX_FRAME_SIZE,
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.codec = codec
+        self.max_frame_size = max_frame_size
+        self.pending: typing.Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @property
+    def is_closed(self) -> bool:
+        return self._reader_task.done()
+
+    async def call(
+        self,
+        name: typing.Text,
+        item: ExecInput,
+    ) -> typing.Any:
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        meta: typing.Dict[typing.Text, typing.Any] = {"call": name}
+        kind, body = REQUEST, typing.cast(typing.Any, b"")
+        for key, value in item.items():
+            if value is None:
+                continue
+            if key == "body" and isinstance(value, bytes):
+                kind, body = REQUEST_BINARY, value
+            elif key == "body" and fastexec.utils.convert.is_binary_body(value):
+                # Buffers are sent in place, files are read
+                kind, body = REQUEST_BINARY, (
+                    value.read() if hasattr(value, "read") else memoryview(value)
+                )
+                meta["buffer"] = True
+            else:
+                meta[key] = fastexec.utils.convert.to_jsonable(value)
+        meta_bytes = self.codec.dumps(meta)
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            write_frame(
+                self.writer,
+                request_id,
+                kind,
+                META_LENGTH.pack(len(meta_bytes)),
+                meta_bytes,
+                body,
+            )
+            await self.writer.drain()
+            kind, payload = await future
+        finally:
+            self.pending.pop(request_id, None)
+        if kind == ERROR:
+            raise decode_error(payload, self.codec)
+        return self.codec.loads(payload)
+
+    async def aclose(self) -> None:
+        self._reader_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._reader_task
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+    async def _read_responses(self) -> None:
+        error: BaseException = ConnectionError("RPC connection closed")
+        try:
+            while (
+                frame := await read_frame(
+                    self.reader, max_frame_size=self.max_frame_size
+                )
+            ) is not None:
+                request_id, kind, payload = frame
+                future = self.pending.get(request_id)
+                if future is not None and not future.done():
+                    future.set_result((kind, payload))
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            error = ConnectionError(f"RPC connection lost: {e}")
+        finally:
+            # Requests in flight fail instead of waiting forever
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+
+class RpcClient:
+    # Calls the callables of an `RpcServer`. Up to `pool_size` connections are
+    # opened on demand and requests are spread over them, many per connection.
+    def __init__(
+        self,
+        path: typing.Optional[typing.Union[typing.Text, os.PathLike]] = None,
+        *,
+        host: typing.Text = "127.0.0.1",
+        port: typing.Optional[int] = None,
+        pool_size: int = 4,
+        codec: typing.Optional[typing.Union[typing.Text, JSONCodec]] = None,
+        max_frame_size: int = MAX_FRAME_SIZE,
+    ):
+        if path is None and port is None:
+            raise ValueError("Either a socket path or a TCP port is required")
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be at least 1, got {pool_size}")
+        self.path = os.fspath(path) if path is not None else None
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.codec = get_codec(codec)
+        self.max_frame_size = max_frame_size
+        self.connections: typing.List[RpcConnection] = []
+        self._connect_lock = asyncio.Lock()
+
+    async def call(
+        self,
+        name: typing.Text,
+        *,
+        query_params: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        headers: typing.Optional[fastexec.utils.convert.JSONObject] = None,
+        body: typing.Optional[typing.Any] = None,
+        state: typing.Optional[typing.Dict] = None,
+        path_params: typing.Optional[typing.Dict[typing.Text, typing.Any]] = None,
+        timeout: typing.Optional[float] = None,
+    ) -> typing.Any:
+        connection = await self._get_connection()
+        item: ExecInput = {
+            "query_params": query_params,
+            "headers": headers,
+            "body": body,
+            "state": state,
+            "path_params": path_params,
+        }
+        async with asyncio.timeout(timeout):
+            return await connection.call(name, item)
+
+    async def aclose(self) -> None:
+        connections, self.connections = self.connections, []
+        for connection in connections:
+            await connection.aclose()
+
+    async def __aenter__(self) -> "RpcClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _get_connection(self) -> RpcConnection:
+        # Least busy open connection, a new one while the pool is not full
+        self.connections = [_c for _c in self.connections if not _c.is_closed]
+        idle = min(self.connections, key=lambda c: len(c.pending), default=None)
+        if idle is not None and (
+            not idle.pending or len(self.connections) >= self.pool_size
+        ):
+            return idle
+        async with self._connect_lock:
+            if len(self.connections) >= self.pool_size:
+                return min(self.connections, key=lambda c: len(c.pending))
+            if self.path is not None:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            connection = RpcConnection(
+                reader, writer, codec=self.codec, max_frame_size=self.max_frame_size
+            )
+            self.connections.append(connection)
+            return connection
+
+
+def serve_rpc(
+    calls: typing.Union[
+        typing.Mapping[typing.Text, typing.Callable],
+        typing.Iterable[typing.Callable],
+    ],
+    **kwargs,
+) -> None:
+    # Runs a worker until interrupted, e.g. as the main of a worker process
+    asyncio.run(RpcServer(calls, **kwargs).serve_forever())
@@ -0,0 +1,120 @@
+import collections
+import dataclasses
+import statistics
+import time
+import typing
+
+
+@dataclasses.dataclass
+class NodeTiming:
+    name: typing.Text
+    call: typing.Callable
+    # Seconds since the start of the execution
+    offset: float
+    wall_time: float
+    # Seconds waiting for a worker thread before a sync function started
+    thread_hop_time: float = 0.0
+    # Resolved from a cross-call cache or the lifespan scope, not called
+    cache_hit: bool = False
+    is_endpoint: bool = False
+
+
+@dataclasses.dataclass
+class ExecutionTrace:
+    started_at: float = dataclasses.field(default_factory=time.perf_counter)
+    started_at_ns: int = dataclasses.field(default_factory=time.time_ns)
+    wall_time: float = 0.0
+    nodes: typing.List[NodeTiming] = dataclasses.field(default_factory=list)
+    error: typing.Optional[BaseException] = None
+
+    def record(
+        self,
+        call: typing.Callable,
+        started: float,
+        *,
+        thread_started: typing.Optional[float] = None,
+        cache_hit: bool = False,
+        is_endpoint: bool = False,
+    ) -> None:
+        self.nodes.append(
+            NodeTiming(
+                name=getattr(call, "__name__", str(call)),
+                call=call,
+                offset=started - self.started_at,
+                wall_time=time.perf_counter() - started,
+                thread_hop_time=(
+                    thread_started - started if thread_started is not None else 0.0
+                ),
+                cache_hit=cache_hit,
+                is_endpoint=is_endpoint,
+            )
+        )
+
+    def finish(self, error: typing.Optional[BaseException] = None) -> None:
+        self.wall_time = time.perf_counter() - self.started_at
+        self.error = error
+
+
+# Called with the trace of every execution, once it finished
+TraceHook = typing.Callable[[ExecutionTrace], None]
+
+
+def mark_started(func: typing.Callable, started: typing.List[float]) -> typing.Callable:
+    # Records when the function actually starts, e.g. once on a worker thread
+    def wrapper(**kwargs):
+        started.append(time.perf_counter())
+        return func(**kwargs)
+
+    return wrapper
+
+
+class NodeStats:
+    # Aggregated timings of one dependency over many executions, latencies are
+    # computed from the most recent `max_samples` calls
+    def __init__(self, name: typing.Text, max_samples: int = 1000):
+        self.name = name
+        self.count = 0
+        self.cache_hits = 0
+        self.wall_times: typing.Deque[float] = collections.deque(maxlen=max_samples)
+
+    def add(self, timing: NodeTiming) -> None:
+        self.count += 1
+        if timing.cache_hit:
+            self.cache_hits += 1
+        self.wall_times.append(timing.wall_time)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.wall_times) if self.wall_times else 0.0
+
+    @property
+    def p99(self) -> float:
+        if len(self.wall_times) < 2:
+            return self.mean
+        return statistics.quantiles(self.wall_times, n=100, method="inclusive")[98]
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cache_hits / self.count if self.count else 0.0
+
+
+class TraceStats:
+    # Trace hook aggregating per-dependency stats, e.g. for graph heat-maps
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self.executions = 0
+        self.nodes: typing.Dict[typing.Callable, NodeStats] = {}
+
+    def __call__(self, trace: ExecutionTrace) -> None:
+        self.executions += 1
+        for timing in trace.nodes:
+            node_stats = self.nodes.get(timing.call)
+            if node_stats is None:
+                node_stats = self.nodes[timing.call] = NodeStats(
+                    timing.name, max_samples=self.max_samples
+                )
+            node_stats.add(timing)
+
+    def reset(self) -> None:
+        self.executions = 0
+        self.nodes.clear()
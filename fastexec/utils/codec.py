@@ -0,0 +1,93 @@
+import json
+import typing
+
+
+class JSONCodec:
+    name: typing.Text = "json"
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return json.dumps(obj, default=str).encode("utf-8")
+
+    def loads(self, data: typing.Union[typing.Text, bytes]) -> typing.Any:
+        # Invalid documents raise `json.JSONDecodeError` for every codec
+        try:
+            return json.loads(data)
+        except UnicodeDecodeError as e:
+            # Binary data that is not even text
+            raise json.JSONDecodeError(str(e), "", 0) from e
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return self._orjson.dumps(obj, default=str, option=self._option)
+
+    def loads(self, data: typing.Union[typing.Text, bytes]) -> typing.Any:
+        # `orjson.JSONDecodeError` subclasses `json.JSONDecodeError`
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._decode_error = msgspec.DecodeError
+        self._encoder = msgspec.json.Encoder(enc_hook=str)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: typing.Union[typing.Text, bytes]) -> typing.Any:
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as e:
+            raise json.JSONDecodeError(str(e), "", 0) from e
+
+
+CODECS: typing.Dict[typing.Text, typing.Type[JSONCodec]] = {
+    "json": JSONCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+_default_codec: JSONCodec = JSONCodec()
+
+
+def get_codec(
+    codec: typing.Optional[typing.Union[typing.Text, JSONCodec]] = None,
+) -> JSONCodec:
+    if codec is None:
+        return _default_codec
+    elif isinstance(codec, JSONCodec):
+        return codec
+    elif codec == "auto":
+        # Fastest installed codec, stdlib json as the last resort
+        for _name in ("orjson", "msgspec"):
+            try:
+                return CODECS[_name]()
+            except ImportError:
+                continue
+        return JSONCodec()
+    elif codec in CODECS:
+        return CODECS[codec]()
+    raise ValueError(f"Unknown codec: {codec}, expected one of {list(CODECS)}")
+
+
+def get_default_codec() -> JSONCodec:
+    return _default_codec
+
+
+def set_default_codec(codec: typing.Union[typing.Text, JSONCodec]) -> JSONCodec:
+    global _default_codec
+    _default_codec = get_codec(codec)
+    return _default_codec
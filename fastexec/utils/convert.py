@@ -1,8 +1,12 @@
-import json
+import functools
 import logging
+import mmap
 import typing
 
 import pydantic
+import pydantic_core
+
+from fastexec.utils.codec import JSONCodec, get_codec
 
 logger = logging.getLogger("fastexec")
 
@@ -18,61 +22,187 @@ JSONSerializable = typing.Union[
 ]
 JSONObject = typing.Union[typing.Dict, pydantic.BaseModel, typing.Text, bytes]
 QueryParams = typing.Mapping[typing.Text, typing.Any]
-Headers = typing.Mapping[typing.Text, typing.Text]
+# A list or tuple value sends the header once per item
+Headers = typing.Mapping[
+    typing.Text, typing.Union[typing.Text, typing.Sequence[typing.Text]]
+]
 Body = typing.Dict[typing.Text, typing.Any]
+# Binary bodies read in place, streamed to `request.stream()` chunk by chunk
+BinaryBody = typing.Union[bytearray, memoryview, mmap.mmap, typing.BinaryIO]
+
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+def is_json_content_type(content_type: typing.Text) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def is_binary_body(data: typing.Any) -> bool:
+    # Buffers and file objects, `bytes` keep their JSON sniffing
+    return isinstance(data, (bytearray, memoryview, mmap.mmap)) or (
+        hasattr(data, "read") and not isinstance(data, (bytes, typing.Text))
+    )
+
+
+def iter_binary_body(
+    data: BinaryBody, chunk_size: int = BODY_CHUNK_SIZE
+) -> typing.Iterator[bytes]:
+    if isinstance(data, (bytearray, memoryview, mmap.mmap)):
+        # Only one chunk is copied out of the buffer at a time
+        with memoryview(data) as view:
+            for start in range(0, len(view), chunk_size):
+                yield view[start : start + chunk_size].tobytes()
+        return
+    while chunk := data.read(chunk_size):
+        yield chunk
 
 
 def dict_to_asgi_headers(
-    headers: typing.Mapping[typing.Text, typing.Text],
+    headers: Headers,
 ) -> typing.List[typing.Tuple[bytes, bytes]]:
     return [
-        (k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers.items()
+        (k.lower().encode("latin1"), _v.encode("latin1"))
+        for k, v in headers.items()
+        for _v in ((v,) if isinstance(v, typing.Text) else v)
     ]
 
 
-def to_query_params(data: typing.Optional[JSONObject] = None) -> QueryParams:
+def get_header(headers: Headers, name: typing.Text) -> typing.Optional[typing.Text]:
+    # First value of a header, by case-insensitive name
+    for k, v in headers.items():
+        if k.lower() == name:
+            return v if isinstance(v, typing.Text) else next(iter(v), None)
+    return None
+
+
+def to_header_value(
+    value: typing.Any,
+) -> typing.Union[typing.Text, typing.List[typing.Text]]:
+    if isinstance(value, (list, tuple)):
+        return [str(_v) for _v in value]
+    return str(value)
+
+
+def to_jsonable(data: typing.Any) -> typing.Any:
+    # JSON compatible objects the way pydantic encodes them, e.g. ISO datetimes
+    # and lists for sets, `str()` only for types it does not know
+    if isinstance(data, pydantic.BaseModel):
+        return data.model_dump(mode="json")
+    return pydantic_core.to_jsonable_python(data, fallback=str)
+
+
+def to_query_params(
+    data: typing.Optional[JSONObject] = None,
+    *,
+    codec: typing.Optional[JSONCodec] = None,
+) -> QueryParams:
     if data is None:
         return {}
-    elif isinstance(data, pydantic.BaseModel):
-        return json.loads(data.model_dump_json())
-    elif isinstance(data, typing.Dict):
-        return json.loads(json.dumps(data, default=str))
+    elif isinstance(data, (pydantic.BaseModel, typing.Dict)):
+        return to_jsonable(data)
     elif isinstance(data, typing.Text):
-        return json.loads(data)
+        return get_codec(codec).loads(data)
     elif isinstance(data, bytes):
-        return json.loads(data)
+        return get_codec(codec).loads(data)
     logger.debug(f"Undefined query params type: {type(data)}, try to convert to dict")
-    return json.loads(json.dumps(dict(data), default=str))  # type: ignore
+    return to_jsonable(dict(data))  # type: ignore
 
 
-def to_headers(data: typing.Optional[JSONObject] = None) -> Headers:
+def to_headers(
+    data: typing.Optional[JSONObject] = None,
+    *,
+    codec: typing.Optional[JSONCodec] = None,
+) -> Headers:
     if data is None:
         return {}
     elif isinstance(data, pydantic.BaseModel):
-        return {k: str(v) for k, v in json.loads(data.model_dump_json()).items()}
+        return {k: to_header_value(v) for k, v in data.model_dump(mode="json").items()}
     elif isinstance(data, typing.Dict):
-        return {k: str(v) for k, v in data.items()}
+        return {k: to_header_value(v) for k, v in data.items()}
     elif isinstance(data, typing.Text):
-        return {k: str(v) for k, v in json.loads(data).items()}
+        return {k: to_header_value(v) for k, v in get_codec(codec).loads(data).items()}
     elif isinstance(data, bytes):
-        return {k: str(v) for k, v in json.loads(data).items()}
+        return {k: to_header_value(v) for k, v in get_codec(codec).loads(data).items()}
     logger.debug(f"Undefined headers type: {type(data)}, try to convert to dict")
-    return {k: str(v) for k, v in dict(data).items()}  # type: ignore
+    return {k: to_header_value(v) for k, v in dict(data).items()}  # type: ignore
 
 
-def to_body(data: typing.Optional[JSONObject] = None) -> Body | bytes:
+def to_body(
+    data: typing.Optional[JSONObject] = None,
+    *,
+    codec: typing.Optional[JSONCodec] = None,
+    content_type: typing.Optional[typing.Text] = None,
+) -> Body | bytes:
     if data is None:
         return {}
-    elif isinstance(data, pydantic.BaseModel):
-        return json.loads(data.model_dump_json())
-    elif isinstance(data, typing.Dict):
-        return json.loads(json.dumps(data, default=str))
+    elif isinstance(data, (pydantic.BaseModel, typing.Dict)):
+        return to_jsonable(data)
     elif isinstance(data, typing.Text):
-        return json.loads(data)
+        return get_codec(codec).loads(data)
+    elif isinstance(data, bytes) and content_type is not None:
+        # Declared content type, no sniffing through the whole buffer
+        if is_json_content_type(content_type):
+            return get_codec(codec).loads(data)
+        return data
     elif isinstance(data, bytes):
         try:
-            return json.loads(data)
-        except json.JSONDecodeError:
+            return get_codec(codec).loads(data)
+        except ValueError:
+            # Not JSON, also for custom codecs raising other decoding errors
             return data  # Is bytes
     logger.debug(f"Undefined body type: {type(data)}, try to convert to dict")
-    return json.loads(json.dumps(dict(data), default=str))  # type: ignore
+    return to_jsonable(dict(data))  # type: ignore
+
+
+class LazyBody:
+    # Request body converted on demand: `content` (parsed JSON) and `raw` (bytes)
+    # are each computed at most once, and only if something reads them
+    def __init__(
+        self,
+        data: typing.Optional[typing.Union[JSONObject, BinaryBody]] = None,
+        *,
+        codec: typing.Optional[JSONCodec] = None,
+        content_type: typing.Optional[typing.Text] = None,
+    ):
+        self.data = data
+        self.codec = get_codec(codec)
+        self.content_type = content_type
+
+    @property
+    def model(self) -> typing.Optional[pydantic.BaseModel]:
+        return self.data if isinstance(self.data, pydantic.BaseModel) else None
+
+    @functools.cached_property
+    def content(self) -> Body | bytes:
+        if is_binary_body(self.data):
+            return to_body(
+                self.raw,
+                codec=self.codec,
+                content_type=self.content_type or "application/octet-stream",
+            )
+        return to_body(self.data, codec=self.codec, content_type=self.content_type)
+
+    @functools.cached_property
+    def raw(self) -> bytes:
+        data = self.data
+        if data is None:
+            return b"{}"
+        elif isinstance(data, bytes):
+            return data
+        elif isinstance(data, typing.Text):
+            return data.encode("utf-8")
+        elif isinstance(data, pydantic.BaseModel):
+            return data.model_dump_json().encode("utf-8")
+        elif isinstance(data, (bytearray, memoryview, mmap.mmap)):
+            return bytes(data)
+        elif is_binary_body(data):
+            return data.read()
+        # Encoded from `content`, `request.body()` and `request.json()` agree
+        return self.codec.dumps(self.content)
+
+    def iter_chunks(self, chunk_size: int = BODY_CHUNK_SIZE) -> typing.Iterator[bytes]:
+        if is_binary_body(self.data) and "raw" not in self.__dict__:
+            yield from iter_binary_body(self.data, chunk_size)
+        else:
+            yield self.raw
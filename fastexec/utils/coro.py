@@ -1,4 +1,9 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
 import inspect
+import typing
 
 from starlette.concurrency import run_in_threadpool
 
@@ -14,3 +19,109 @@ async def call_any_function(func, **kwargs):
     else:
         # Sync function, run in threadpool
         return await run_in_threadpool(func, **kwargs)
+
+
+class Executor:
+    # Runs sync functions, the default shares starlette's threadpool
+    name: typing.Text = "default"
+
+    async def run(
+        self, func: typing.Callable, kwargs: typing.Dict[typing.Text, typing.Any]
+    ) -> typing.Any:
+        return await run_in_threadpool(func, **kwargs)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InlineExecutor(Executor):
+    # No thread hop, for trivial sync functions only since it blocks the loop
+    name = "inline"
+
+    async def run(
+        self, func: typing.Callable, kwargs: typing.Dict[typing.Text, typing.Any]
+    ) -> typing.Any:
+        return func(**kwargs)
+
+
+class ThreadPoolExecutor(Executor):
+    # Dedicated threads, not competing with starlette's shared 40-token limiter
+    name = "thread"
+
+    def __init__(self, max_workers: typing.Optional[int] = None):
+        self.max_workers = max_workers
+        self._pool: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    @property
+    def pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        # Created on first use, and again after a shutdown
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="fastexec"
+            )
+        return self._pool
+
+    async def run(
+        self, func: typing.Callable, kwargs: typing.Dict[typing.Text, typing.Any]
+    ) -> typing.Any:
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool, functools.partial(context.run, func, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+class ProcessPoolExecutor(Executor):
+    # CPU-bound functions, the function and its arguments must be picklable
+    name = "process"
+
+    def __init__(self, max_workers: typing.Optional[int] = None):
+        self.max_workers = max_workers
+        self._pool: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        # Created on first use, and again after a shutdown
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers
+            )
+        return self._pool
+
+    async def run(
+        self, func: typing.Callable, kwargs: typing.Dict[typing.Text, typing.Any]
+    ) -> typing.Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool, functools.partial(func, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+EXECUTORS: typing.Dict[typing.Text, typing.Type[Executor]] = {
+    "default": Executor,
+    "inline": InlineExecutor,
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+DEFAULT_EXECUTOR = Executor()
+
+
+def get_executor(
+    executor: typing.Optional[typing.Union[typing.Text, Executor]] = None,
+) -> Executor:
+    if executor is None:
+        return DEFAULT_EXECUTOR
+    elif isinstance(executor, Executor):
+        return executor
+    elif executor in EXECUTORS:
+        return EXECUTORS[executor]()
+    raise ValueError(f"Unknown executor: {executor}, expected one of {list(EXECUTORS)}")
@@ -1,122 +1,357 @@
+import dataclasses
+import json
 import pathlib
 import typing
+from xml.sax.saxutils import escape, quoteattr
 
 import fastapi
 import fastapi.dependencies.models
 import graphviz
 
+if typing.TYPE_CHECKING:
+    from fastexec._trace import TraceStats
+
+# Heat-map colors, from cold (fast) to hot (slow) nodes
+COLD_COLOR = (0xFF, 0xF5, 0xEB)
+HOT_COLOR = (0xD7, 0x30, 0x1F)
+HOT_COLOR_HEX = "#d7301f"
+
+GRAPH_ATTR = {
+    "rankdir": "TB",  # Top to bottom layout (vertical)
+    "bgcolor": "#f7f7f7",  # Light gray background
+    "fontname": "Arial",
+    "fontsize": "12",
+    "splines": "curved",  # Curved lines
+    "nodesep": "0.5",  # Space between nodes
+    "ranksep": "0.75",  # Space between ranks
+}
+NODE_ATTR = {
+    "shape": "box",
+    "style": "rounded,filled",
+    "fillcolor": "#e6f3ff",  # Light blue nodes (default)
+    "color": "#4c7ebd",  # Border color
+    "fontname": "Arial",
+    "fontsize": "10",
+    "height": "0.4",
+    "width": "0.4",
+    "penwidth": "1.0",
+    "margin": "0.2,0.1",
+}
+EDGE_ATTR = {
+    "color": "#666666",
+    "arrowsize": "0.7",
+    "penwidth": "1.0",
+    "fontname": "Arial",
+    "fontsize": "8",
+}
+PATH_NODE_ATTR = {
+    "fillcolor": "#d5f5e3",  # Light green for starting node
+    "color": "#2ecc71",  # Dark green border
+    "fontname": "Arial Bold",
+    "fontsize": "11",
+}
+TERMINAL_NODE_ATTR = {
+    "fillcolor": "#ffeecc",  # Light orange
+    "color": "#d4a76a",  # Darker orange border
+}
+CRITICAL_EDGE_ATTR = {"color": HOT_COLOR_HEX, "penwidth": "2.5"}
+
+GRAPH_FORMATS = ("dot", "svg", "json", "png")
+PATH_NODE_ID = "path_node"
+
+
+@dataclasses.dataclass
+class GraphNode:
+    id: typing.Text
+    label: typing.Text
+    # Longest distance from a leaf dependency, leaves are at rank 0
+    rank: int = 0
+    attributes: typing.Dict[typing.Text, typing.Text] = dataclasses.field(
+        default_factory=dict
+    )
+
+
+@dataclasses.dataclass
+class GraphEdge:
+    # Arrows point from the dependency to the function depending on it
+    source: typing.Text
+    target: typing.Text
+    attributes: typing.Dict[typing.Text, typing.Text] = dataclasses.field(
+        default_factory=dict
+    )
+
+
+@dataclasses.dataclass
+class DependantGraph:
+    name: typing.Text
+    nodes: typing.List[GraphNode]
+    edges: typing.List[GraphEdge]
+
+
+def get_label(call: typing.Any) -> typing.Text:
+    return getattr(call, "__name__", str(call))
+
+
+def walk_dependant(
+    dep: fastapi.dependencies.models.Dependant,
+) -> typing.Dict[typing.Any, typing.List[typing.Any]]:
+    # Unique sub-dependency calls of every call, in depth-first order. Each call
+    # is expanded once, so shared dependencies are not walked again.
+    children: typing.Dict[typing.Any, typing.List[typing.Any]] = {}
+    stack = [dep]
+    while stack:
+        dependant = stack.pop()
+        if dependant.call in children:
+            continue
+        subdeps = getattr(dependant, "dependencies", [])
+        children[dependant.call] = list(dict.fromkeys(d.call for d in subdeps))
+        stack.extend(d for d in reversed(subdeps) if d.call not in children)
+    return children
+
+
+def get_post_order(
+    children: typing.Dict[typing.Any, typing.List[typing.Any]], root: typing.Any
+) -> typing.List[typing.Any]:
+    # Dependencies before their dependents
+    order: typing.List[typing.Any] = []
+    seen = set()
+    stack: typing.List[typing.Tuple[typing.Any, bool]] = [(root, False)]
+    while stack:
+        key, expanded = stack.pop()
+        if expanded:
+            order.append(key)
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        stack.append((key, True))
+        stack.extend((_c, False) for _c in reversed(children[key]) if _c not in seen)
+    return order
+
+
+def get_heat_color(ratio: float) -> typing.Text:
+    ratio = min(max(ratio, 0.0), 1.0)
+    return "#" + "".join(
+        f"{round(_cold + (_hot - _cold) * ratio):02x}"
+        for _cold, _hot in zip(COLD_COLOR, HOT_COLOR)
+    )
+
+
+def get_critical_path(
+    dep: fastapi.dependencies.models.Dependant,
+    stats: "TraceStats",
+    *,
+    children: typing.Optional[typing.Dict[typing.Any, typing.List[typing.Any]]] = None,
+) -> typing.List[typing.Callable]:
+    # Chain of calls, from the root down, with the largest total mean latency
+    children = walk_dependant(dep) if children is None else children
+    longest: typing.Dict[typing.Any, typing.Tuple[float, typing.List]] = {}
+    for key in get_post_order(children, dep.call):
+        best: typing.Tuple[float, typing.List] = (0.0, [])
+        for child in children[key]:
+            if longest[child][0] > best[0] or not best[1]:
+                best = longest[child]
+        node_stats = stats.nodes.get(key)
+        weight = node_stats.mean if node_stats is not None else 0.0
+        longest[key] = (weight + best[0], [key, *best[1]])
+    return longest[dep.call][1]
+
+
+def build_dependant_graph(
+    dep: fastapi.dependencies.models.Dependant,
+    *,
+    name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
+) -> DependantGraph:
+    # Linear in the number of nodes and edges
+    children = walk_dependant(dep)
+
+    ranks: typing.Dict[typing.Any, int] = {}
+    for key in get_post_order(children, dep.call):
+        ranks[key] = 1 + max((ranks[_c] for _c in children[key]), default=-1)
+
+    # Runtime stats overlay: heat-map colors and the critical path
+    critical_edges = set()
+    max_mean = 0.0
+    if stats is not None:
+        critical_path = get_critical_path(dep, stats, children=children)
+        critical_edges = set(zip(critical_path[1:], critical_path[:-1]))
+        max_mean = max((_s.mean for _s in stats.nodes.values()), default=0.0)
+
+    nodes: typing.Dict[typing.Any, GraphNode] = {}
+    for key in children:
+        label = get_label(key)
+        node = GraphNode(id=f"{label}_{len(nodes)}", label=label, rank=ranks[key])
+        node_stats = stats.nodes.get(key) if stats is not None else None
+        if node_stats is not None:
+            node.label = (
+                f"{label}\n"
+                f"mean {node_stats.mean * 1e3:.2f}ms "
+                f"p99 {node_stats.p99 * 1e3:.2f}ms\n"
+                f"calls {node_stats.count} "
+                f"hit {node_stats.cache_hit_rate:.0%}"
+            )
+            node.attributes["fillcolor"] = get_heat_color(
+                node_stats.mean / max_mean if max_mean else 0.0
+            )
+        nodes[key] = node
+
+    # Reverse the arrows: dependency (child) -> parent
+    edges = [
+        GraphEdge(
+            source=nodes[child].id,
+            target=nodes[key].id,
+            attributes=(
+                dict(CRITICAL_EDGE_ATTR) if (child, key) in critical_edges else {}
+            ),
+        )
+        for key, subcalls in children.items()
+        for child in subcalls
+    ]
+
+    graph_nodes = list(nodes.values())
+    root = nodes[dep.call]
+    if dep.path:
+        path_node = GraphNode(
+            id=PATH_NODE_ID,
+            label=str(dep.path),
+            rank=root.rank + 1,
+            attributes=dict(PATH_NODE_ATTR),
+        )
+        graph_nodes.insert(0, path_node)
+        edges.append(GraphEdge(source=path_node.id, target=root.id))
+
+    # The root is the terminal node of its dependencies
+    if stats is None and children[dep.call]:
+        root.attributes.update(TERMINAL_NODE_ATTR)
+
+    return DependantGraph(name=name, nodes=graph_nodes, edges=edges)
+
 
 def visualize_dependant(
     dep: fastapi.dependencies.models.Dependant,
     *,
     name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
 ) -> graphviz.Digraph:
+    graph = build_dependant_graph(dep, name=name, stats=stats)
+
     # Create a new digraph with styling
     dot = graphviz.Digraph(
         comment=name,
         format="png",
         engine="dot",
-        graph_attr={
-            "rankdir": "TB",  # Top to bottom layout (vertical)
-            "bgcolor": "#f7f7f7",  # Light gray background
-            "fontname": "Arial",
-            "fontsize": "12",
-            "splines": "curved",  # Curved lines
-            "nodesep": "0.5",  # Space between nodes
-            "ranksep": "0.75",  # Space between ranks
-        },
-        node_attr={
-            "shape": "box",
-            "style": "rounded,filled",
-            "fillcolor": "#e6f3ff",  # Light blue nodes (default)
-            "color": "#4c7ebd",  # Border color
-            "fontname": "Arial",
-            "fontsize": "10",
-            "height": "0.4",
-            "width": "0.4",
-            "penwidth": "1.0",
-            "margin": "0.2,0.1",
-        },
-        edge_attr={
-            "color": "#666666",
-            "arrowsize": "0.7",
-            "penwidth": "1.0",
-            "fontname": "Arial",
-            "fontsize": "8",
-        },
+        graph_attr=GRAPH_ATTR,
+        node_attr=NODE_ATTR,
+        edge_attr=EDGE_ATTR,
     )
+    for node in graph.nodes:
+        dot.node(node.id, label=node.label, _attributes=node.attributes or None)
+    for edge in graph.edges:
+        dot.edge(edge.source, edge.target, _attributes=edge.attributes or None)
+    return dot
 
-    visited = {}  # dictionary mapping function object to node id
-    added_edges = set()  # set to track already added reversed edges (child, parent)
-    parents = set()  # to track nodes that are parents
-    all_nodes = set()  # to track all nodes
 
-    # Build the starting node (path node)
-    path_node_id = None
-    if dep.path:
-        path_node_id = "path_node"
-        dot.node(
-            path_node_id,
-            label=str(dep.path),
-            _attributes={
-                "fillcolor": "#d5f5e3",  # Light green for starting node
-                "color": "#2ecc71",  # Dark green border
-                "fontname": "Arial Bold",
-                "fontsize": "11",
-            },
+def to_dot(
+    dep: fastapi.dependencies.models.Dependant,
+    *,
+    name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
+) -> typing.Text:
+    return visualize_dependant(dep, name=name, stats=stats).source
+
+
+def to_json_graph(
+    dep: fastapi.dependencies.models.Dependant,
+    *,
+    name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
+) -> typing.Dict[typing.Text, typing.Any]:
+    graph = build_dependant_graph(dep, name=name, stats=stats)
+    adjacency: typing.Dict[typing.Text, typing.List[typing.Text]] = {
+        node.id: [] for node in graph.nodes
+    }
+    for edge in graph.edges:
+        if edge.source != PATH_NODE_ID:
+            adjacency[edge.target].append(edge.source)
+    return {
+        "name": graph.name,
+        "nodes": [dataclasses.asdict(node) for node in graph.nodes],
+        "edges": [dataclasses.asdict(edge) for edge in graph.edges],
+        # Node id -> ids of the nodes it depends on
+        "adjacency": adjacency,
+    }
+
+
+def to_svg(
+    dep: fastapi.dependencies.models.Dependant,
+    *,
+    name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
+) -> typing.Text:
+    # Layered layout drawn without the graphviz binary: leaves on top, one row
+    # per rank, nodes left to right in traversal order.
+    graph = build_dependant_graph(dep, name=name, stats=stats)
+    char_width, line_height, padding, gap = 7, 14, 10, 30
+
+    rows: typing.Dict[int, typing.List[GraphNode]] = {}
+    for node in graph.nodes:
+        rows.setdefault(node.rank, []).append(node)
+
+    boxes: typing.Dict[typing.Text, typing.Tuple[float, float, float, float]] = {}
+    width = height = 0.0
+    y = float(gap)
+    for rank in sorted(rows):
+        x = float(gap)
+        row_height = 0.0
+        for node in rows[rank]:
+            lines = node.label.split("\n")
+            w = max(len(line) for line in lines) * char_width + 2 * padding
+            h = len(lines) * line_height + 2 * padding
+            boxes[node.id] = (x, y, w, h)
+            x += w + gap
+            row_height = max(row_height, h)
+        width = max(width, x)
+        y += row_height + 2 * gap
+        height = y
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" '
+        f'height="{height:.0f}" font-family="{GRAPH_ATTR["fontname"]}" '
+        f'font-size="{NODE_ATTR["fontsize"]}">',
+        f"<title>{escape(graph.name)}</title>",
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" '
+        'markerWidth="7" markerHeight="7" orient="auto-start-reverse">'
+        '<path d="M 0 0 L 10 5 L 0 10 z" fill="context-stroke"/></marker></defs>',
+        f'<rect width="100%" height="100%" fill="{GRAPH_ATTR["bgcolor"]}"/>',
+    ]
+    for edge in graph.edges:
+        sx, sy, sw, sh = boxes[edge.source]
+        tx, ty, tw, _ = boxes[edge.target]
+        attributes = {**EDGE_ATTR, **edge.attributes}
+        parts.append(
+            f'<line x1="{sx + sw / 2:.1f}" y1="{sy + sh:.1f}" '
+            f'x2="{tx + tw / 2:.1f}" y2="{ty:.1f}" stroke="{attributes["color"]}" '
+            f'stroke-width="{attributes["penwidth"]}" marker-end="url(#arrow)"/>'
+        )
+    for node in graph.nodes:
+        x, y, w, h = boxes[node.id]
+        attributes = {**NODE_ATTR, **node.attributes}
+        parts.append(
+            f"<g id={quoteattr(node.id)}>"
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" '
+            f'rx="6" fill="{attributes["fillcolor"]}" '
+            f'stroke="{attributes["color"]}"/>'
         )
-        all_nodes.add(path_node_id)
-
-    def add_nodes(dependant, parent_id=None):
-        key = dependant.call  # use the function object as the key
-        if key in visited:
-            node_id = visited[key]
-        else:
-            label = getattr(dependant.call, "__name__", str(dependant.call))
-            node_id = f"{label}_{len(visited)}"
-            visited[key] = node_id
-            # We'll set the color later after identifying terminal nodes
-            dot.node(node_id, label=label)
-            all_nodes.add(node_id)
-
-        if parent_id is not None:
-            parents.add(parent_id)
-            edge = (node_id, parent_id)
-            if edge not in added_edges:
-                # Reverse the arrow: dependency (child) -> parent
-                dot.edge(node_id, parent_id)
-                added_edges.add(edge)
-
-        for subdep in getattr(dependant, "dependencies", []):
-            add_nodes(subdep, node_id)
-
-    # Add dependencies
-    add_nodes(dep)
-
-    # If path node exists, connect it to the root dependency node
-    if path_node_id and visited:
-        root_node = visited.get(dep.call)
-        if root_node:
-            dot.edge(path_node_id, root_node)
-            parents.add(path_node_id)
-            added_edges.add((path_node_id, root_node))
-
-    # Identify terminal nodes (nodes that are parents but have no children)
-    terminal_nodes = parents - {src for src, _ in added_edges}
-
-    # Update terminal nodes to have a different color
-    for node_id in all_nodes:
-        if node_id in terminal_nodes:
-            # Terminal nodes get a different color (light orange)
-            dot.node(
-                node_id,
-                _attributes={
-                    "fillcolor": "#ffeecc",  # Light orange
-                    "color": "#d4a76a",  # Darker orange border
-                },
+        for index, line in enumerate(node.label.split("\n")):
+            parts.append(
+                f'<text x="{x + w / 2:.1f}" '
+                f'y="{y + padding + (index + 0.8) * line_height:.1f}" '
+                f'text-anchor="middle">{escape(line)}</text>'
             )
-
-    return dot
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts)
 
 
 def save_dependant_graph_image(
@@ -124,12 +359,37 @@ def save_dependant_graph_image(
     path: typing.Text | pathlib.Path,
     *,
     name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
 ) -> pathlib.Path:
     path = pathlib.Path(path)
 
     # Visualize the dependency graph of the dependant function
-    dot = visualize_dependant(dep, name=name)
+    dot = visualize_dependant(dep, name=name, stats=stats)
     dot.format = "png"  # Save output as PNG image
     dot.render(path.with_suffix("") if str(path).endswith(".png") else path)
 
     return path
+
+
+def save_dependant_graph(
+    dep: fastapi.dependencies.models.Dependant,
+    path: typing.Text | pathlib.Path,
+    *,
+    name: typing.Text = "Dependency Graph",
+    stats: typing.Optional["TraceStats"] = None,
+    format: typing.Optional[typing.Text] = None,
+) -> pathlib.Path:
+    # Only "png" invokes the graphviz binary, the format defaults to the suffix
+    path = pathlib.Path(path)
+    format = format or path.suffix.lstrip(".").replace("gv", "dot") or "png"
+    if format == "png":
+        return save_dependant_graph_image(dep, path, name=name, stats=stats)
+    elif format == "dot":
+        path.write_text(to_dot(dep, name=name, stats=stats))
+    elif format == "svg":
+        path.write_text(to_svg(dep, name=name, stats=stats))
+    elif format == "json":
+        path.write_text(json.dumps(to_json_graph(dep, name=name, stats=stats)))
+    else:
+        raise ValueError(f"Unknown format: {format}, expected one of {GRAPH_FORMATS}")
+    return path
@@ -0,0 +1,43 @@
+import typing
+
+from fastexec._trace import ExecutionTrace
+
+
+class OpenTelemetryHook:
+    # Trace hook exporting each execution as a span with one child span per
+    # dependency, requires `opentelemetry-api`
+    def __init__(
+        self,
+        tracer: typing.Optional[typing.Any] = None,
+        *,
+        span_name: typing.Text = "fastexec.exec",
+    ):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("fastexec")
+        self.span_name = span_name
+
+    def __call__(self, execution: ExecutionTrace) -> None:
+        started_at_ns = execution.started_at_ns
+        root = self.tracer.start_span(self.span_name, start_time=started_at_ns)
+        context = self._trace.set_span_in_context(root)
+        for node in execution.nodes:
+            node_started_at_ns = started_at_ns + int(node.offset * 1e9)
+            span = self.tracer.start_span(
+                node.name,
+                context=context,
+                start_time=node_started_at_ns,
+                attributes={
+                    "fastexec.thread_hop_time": node.thread_hop_time,
+                    "fastexec.cache_hit": node.cache_hit,
+                    "fastexec.is_endpoint": node.is_endpoint,
+                },
+            )
+            span.end(end_time=node_started_at_ns + int(node.wall_time * 1e9))
+        if execution.error is not None:
+            root.record_exception(execution.error)
+            root.set_status(
+                self._trace.Status(self._trace.StatusCode.ERROR, str(execution.error))
+            )
+        root.end(end_time=started_at_ns + int(execution.wall_time * 1e9))
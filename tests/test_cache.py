@@ -0,0 +1,83 @@
+import time
+
+import fastapi
+import pytest
+
+from fastexec import CachePolicy, FastExec
+from fastexec._cache import DependencyCache
+
+
+def test_dependency_cache_ttl_and_lru():
+    cache = DependencyCache(CachePolicy(ttl=0.05, maxsize=2))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+
+    time.sleep(0.06)
+    assert cache.get("a") == (False, None)
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 2
+    assert cache.stats.size == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_dependency_cache():
+    call_counts = {"get_config": 0, "introspect_token": 0}
+
+    def get_config():
+        call_counts["get_config"] += 1
+        return {"issuer": "auth"}
+
+    def introspect_token(
+        authorization: str = fastapi.Header(),
+        config: dict = fastapi.Depends(get_config),
+    ):
+        call_counts["introspect_token"] += 1
+        return f"{config['issuer']}:{authorization}"
+
+    async def endpoint(token: str = fastapi.Depends(introspect_token)):
+        return token
+
+    app = FastExec(
+        call=endpoint, dependency_cache={introspect_token: CachePolicy(ttl=60)}
+    )
+    for token in ("a", "b", "a", "a"):
+        assert await app.exec(headers={"Authorization": token}) == f"auth:{token}"
+
+    assert call_counts == {"get_config": 2, "introspect_token": 2}
+    stats = app.dependency_caches[introspect_token].stats
+    assert (stats.hits, stats.misses, stats.size) == (2, 2, 2)
+
+    app.invalidate_dependency_cache(introspect_token)
+    await app.exec(headers={"Authorization": "a"})
+    assert call_counts["introspect_token"] == 3
+
+
+def test_fast_exec_dependency_cache_validation():
+    def get_session():
+        yield "session"
+
+    def get_payload(payload: dict = fastapi.Body()):
+        return payload
+
+    def who(request: fastapi.Request):
+        return request.headers["x-user"]
+
+    def get_user(user: str = fastapi.Depends(who)):
+        return user
+
+    def endpoint(
+        session: str = fastapi.Depends(get_session),
+        payload: dict = fastapi.Depends(get_payload),
+        user: str = fastapi.Depends(get_user),
+    ):
+        return session, payload, user
+
+    for call in (get_session, get_payload, who, get_user, print):
+        with pytest.raises(ValueError):
+            FastExec(call=endpoint, dependency_cache={call: CachePolicy()})
+    # Keyed on the inputs it reads from the request
+    FastExec(call=endpoint, dependency_cache={who: CachePolicy(headers=["X-User"])})
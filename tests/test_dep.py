@@ -0,0 +1,44 @@
+import fastapi
+
+from fastexec import CacheStats, DependantCache, FastExec
+from fastexec._dep import DEPENDANT_CACHE
+
+
+def get_config():
+    return {"name": "app"}
+
+
+def endpoint(config: dict = fastapi.Depends(get_config)):
+    return config["name"]
+
+
+def test_fast_exec_shares_dependant_analysis():
+    first, second = FastExec(call=endpoint), FastExec(call=endpoint)
+    assert first.dependant is second.dependant
+    assert first.plan is second.plan
+
+    lifespan = FastExec(call=endpoint, lifespan_dependencies=[get_config])
+    assert lifespan.dependant is first.dependant
+    assert lifespan.plan is not first.plan
+    assert lifespan.plan.nodes[0].lifespan and not first.plan.nodes[0].lifespan
+    assert DEPENDANT_CACHE.stats.hits >= 3
+
+
+def test_dependant_cache_limits():
+    cache = DependantCache(maxsize=2)
+    cache.warm_up([endpoint])
+    assert cache.stats.size == 2  # Dependant and plan
+    assert cache.get_dependant(endpoint) is cache.get_dependant(endpoint)
+
+    class Service:
+        def handle(self, config: dict = fastapi.Depends(get_config)):
+            return config
+
+    service = Service()
+    # Bound methods are equal across attribute accesses
+    assert cache.get_dependant(service.handle) is cache.get_dependant(service.handle)
+    assert cache.stats == CacheStats(hits=3, misses=3, size=2)  # LRU evicted
+    assert cache.get_dependant(endpoint) is not FastExec(call=endpoint).dependant
+
+    disabled = DependantCache(maxsize=0)
+    assert disabled.get_dependant(endpoint) is not disabled.get_dependant(endpoint)
@@ -0,0 +1,144 @@
+import fastapi
+import pydantic
+import pytest
+
+from fastexec import CachePolicy, Dispatcher
+
+
+class Item(pydantic.BaseModel):
+    name: str
+
+
+def get_db():
+    return "db"
+
+
+def get_fake_db():
+    return "fake db"
+
+
+def get_user(x_user: str = fastapi.Header(default="anonymous")):
+    return x_user
+
+
+router = fastapi.APIRouter(prefix="/items", dependencies=[fastapi.Depends(get_user)])
+
+
+@router.get("/featured")
+def featured_items():
+    return ["featured"]
+
+
+@router.get("/{item_id}")
+async def read_item(
+    item_id: int,
+    request: fastapi.Request,
+    q: str = "",
+    db: str = fastapi.Depends(get_db),
+):
+    return {"item_id": item_id, "q": q, "db": db, "method": request.method}
+
+
+@router.post("")
+async def create_item(item: Item, user: str = fastapi.Depends(get_user)):
+    return {"name": item.name, "user": user}
+
+
+@router.get("/latest")
+def latest_items():
+    # Shadowed by "/{item_id}", declared before it
+    return ["latest"]
+
+
+app = fastapi.FastAPI()
+app.include_router(router)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_routes_by_method_and_path():
+    dispatcher = Dispatcher(app)
+    assert await dispatcher.exec("GET", "/items/42?q=hello") == {
+        "item_id": 42,
+        "q": "hello",
+        "db": "db",
+        "method": "GET",
+    }
+    assert await dispatcher.exec("GET", "/items/featured") == ["featured"]
+    assert await dispatcher.exec(
+        "post", "/items", body={"name": "pen"}, headers={"X-User": "alice"}
+    ) == {"name": "pen", "user": "alice"}
+
+    for method, path, status_code in (
+        ("GET", "/missing", 404),
+        ("DELETE", "/items/42", 405),
+        ("GET", "/items/not-an-int", 400),  # Path param validation
+        ("GET", "/items/latest", 400),  # Matched by "/{item_id}" first
+    ):
+        with pytest.raises(fastapi.HTTPException) as exc_info:
+            await dispatcher.exec(method, path)
+        assert exc_info.value.status_code == status_code
+
+    app.dependency_overrides[get_db] = get_fake_db
+    try:
+        assert (await dispatcher.exec("GET", "/items/1"))["db"] == "fake db"
+    finally:
+        app.dependency_overrides.clear()
+    assert (await dispatcher.exec("GET", "/items/1"))["db"] == "db"
+
+    router_dispatcher = Dispatcher(router)
+    assert (await router_dispatcher.exec("GET", "/items/7"))["item_id"] == 7
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_dependency_options():
+    opened, closed = [], []
+
+    def get_pool():
+        opened.append("pool")
+        yield "pool"
+        closed.append("pool")
+
+    def get_config():
+        return {"debug": False}
+
+    options_app = fastapi.FastAPI()
+
+    @options_app.get("/pool")
+    def use_pool(pool: str = fastapi.Depends(get_pool)):
+        return pool
+
+    @options_app.api_route("/pool/other", methods=["GET", "POST"])
+    def use_other_pool(pool: str = fastapi.Depends(get_pool)):
+        return pool
+
+    @options_app.get("/config")
+    def use_config(config: dict = fastapi.Depends(get_config)):
+        return config
+
+    @options_app.post("/form")
+    def use_form(name: str = fastapi.Form()):
+        return name
+
+    # Only applied to the routes having the dependency, or a plan to freeze
+    dispatcher = Dispatcher(
+        options_app,
+        lifespan_dependencies=[get_pool],
+        dependency_cache={get_config: CachePolicy()},
+        freeze="lazy",
+    )
+    assert await dispatcher.exec("GET", "/pool") == "pool"
+    assert await dispatcher.exec("GET", "/pool/other") == "pool"
+    assert await dispatcher.exec("POST", "/pool/other") == "pool"
+    assert await dispatcher.exec("GET", "/config") == {"debug": False}
+    # One lifespan scope for all the routes, one instance per route
+    assert opened == ["pool"]
+    assert len(list(dispatcher.iter_fast_execs())) == 4
+
+    # Replaced routes are closed
+    options_app.dependency_overrides[get_config] = lambda: {"debug": True}
+    assert await dispatcher.exec("GET", "/config") == {"debug": True}
+    assert closed == ["pool"]
+    assert await dispatcher.exec("GET", "/pool") == "pool"
+    await dispatcher.aclose()
+    assert opened == ["pool", "pool"]
+    assert closed == ["pool", "pool"]
@@ -1,3 +1,8 @@
+import asyncio
+import mmap
+import threading
+import typing
+
 import fastapi
 import pytest
 
@@ -149,3 +154,207 @@ async def test_exec_with_dependant():
     assert (
         result.get("app_name") == "DAG Processor"
     ), "App state was not passed correctly."
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_reuses_app():
+    seen_apps = []
+
+    def endpoint(request: fastapi.Request):
+        seen_apps.append(request.app)
+        return request.app.state.db_pool
+
+    app = FastExec(call=endpoint, state={"db_pool": "pool"})
+    assert await app.exec() == "pool"
+    assert await app.exec() == "pool"
+    assert seen_apps[0] is seen_apps[1] is app.app
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_bring_your_own_app():
+    real_app = fastapi.FastAPI()
+    real_app.state.db_pool = "real_pool"
+
+    def endpoint(request: fastapi.Request):
+        return request.app, request.app.state.db_pool, request.app.state.app_name
+
+    app = FastExec(call=endpoint, app=real_app, state={"app_name": "DAG Processor"})
+    result = await app.exec()
+    assert result == (real_app, "real_pool", "DAG Processor")
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_exec_many():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def endpoint(value: int):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01 * (value % 3))
+        in_flight -= 1
+        return value * 2
+
+    async def inputs():
+        for value in range(9):
+            yield {"query_params": {"value": value}}
+        yield {"query_params": {"value": "invalid"}}
+
+    app = FastExec(call=endpoint)
+    results = await app.exec_many(inputs(), concurrency=3)
+
+    assert max_in_flight <= 3
+    assert [r.index for r in results] == list(range(10))
+    assert [r.value for r in results[:9]] == [v * 2 for v in range(9)]
+    assert not results[9].ok
+    assert isinstance(results[9].error, fastapi.HTTPException)
+
+    results = await app.exec_many(
+        [{"query_params": {"value": v}} for v in (2, 0)], ordered=False
+    )
+    assert [r.value for r in results] == [0, 4]
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_exec_stream_backpressure():
+    pulled = 0
+
+    def endpoint(value: int):
+        return value
+
+    async def inputs():
+        nonlocal pulled
+        for value in range(100):
+            pulled += 1
+            yield {"query_params": {"value": value}}
+
+    app = FastExec(call=endpoint)
+    stream = app.exec_stream(inputs(), concurrency=4, ordered=True)
+    first = await anext(stream)
+    assert first.index == 0 and first.value == 0
+    # Intake paused at the in-flight window while the consumer is idle
+    assert pulled <= 5
+
+    values = [first.value] + [result.value async for result in stream]
+    assert values == list(range(100))
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_yield_dependency_open_during_endpoint():
+    events = []
+
+    def get_session():
+        events.append("open")
+        yield "session"
+        events.append("close")
+
+    async def endpoint(session: str = fastapi.Depends(get_session)):
+        events.append(f"endpoint {session}")
+        return session
+
+    app = FastExec(call=endpoint)
+    assert await app.exec() == "session"
+    assert events == ["open", "endpoint session", "close"]
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_lifespan_dependencies():
+    events = []
+
+    def get_settings():
+        events.append("settings")
+        return {"dsn": "sqlite://"}
+
+    async def get_pool(settings: dict = fastapi.Depends(get_settings)):
+        events.append("connect")
+        yield f"pool {settings['dsn']}"
+        events.append("disconnect")
+
+    def get_session(pool: str = fastapi.Depends(get_pool)):
+        events.append("session")
+        yield f"session of {pool}"
+
+    async def endpoint(session: str = fastapi.Depends(get_session)):
+        return session
+
+    async with FastExec(call=endpoint, lifespan_dependencies=[get_pool]) as app:
+        for _ in range(3):
+            assert await app.exec() == "session of pool sqlite://"
+        assert events == ["settings", "connect", "session", "session", "session"]
+
+    assert events[-1] == "disconnect"
+    assert events.count("disconnect") == 1
+
+
+def test_fast_exec_exec_sync():
+    def get_user(authorization: str = fastapi.Header()):
+        return authorization, threading.current_thread().name
+
+    def sync_endpoint(user: tuple = fastapi.Depends(get_user)):
+        return user
+
+    async def async_endpoint(user: tuple = fastapi.Depends(get_user)):
+        return user
+
+    app = FastExec(call=sync_endpoint)
+    assert app.is_sync
+    assert app.exec_sync(headers={"Authorization": "token"}) == (
+        "token",
+        threading.current_thread().name,
+    )
+
+    app = FastExec(call=async_endpoint)
+    assert not app.is_sync
+    for _ in range(2):
+        assert app.exec_sync(headers={"Authorization": "token"})[0] == "token"
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_streams_binary_bodies(tmp_path):
+    data = bytes(range(256)) * 1024  # 256 KiB, several stream chunks
+
+    async def upload(request: fastapi.Request):
+        sizes = [len(chunk) async for chunk in request.stream() if chunk]
+        return sizes
+
+    async def read_body(request: fastapi.Request):
+        return await request.body()
+
+    path = tmp_path.joinpath("upload.bin")
+    path.write_bytes(data)
+    headers = {"Content-Type": "application/octet-stream"}
+
+    app = FastExec(call=upload)
+    assert await app.exec(body=memoryview(data), headers=headers) == [65536] * 4
+    with path.open("rb") as f:
+        assert await app.exec(body=f, headers=headers) == [65536] * 4
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert await app.exec(body=m) == [65536] * 4
+        assert await FastExec(call=read_body).exec(body=m) == data
+    assert await FastExec(call=read_body).exec(body=data, headers=headers) is data
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_default_headers_and_query_params():
+    async def endpoint(
+        request: fastapi.Request,
+        tag: typing.List[str] = fastapi.Query(default=[]),
+        x_tenant: str = fastapi.Header(),
+    ):
+        return tag, x_tenant, request.headers.getlist("x-trace")
+
+    app = FastExec(
+        call=endpoint,
+        default_headers={"X-Tenant": "acme", "X-Trace": ["a", "b"]},
+        default_query_params={"tag": ["x", "y"]},
+    )
+    assert await app.exec() == (["x", "y"], "acme", ["a", "b"])
+    assert await app.exec(
+        query_params={"tag": "z"}, headers={"X-Trace": ["c"], "X-Other": "1"}
+    ) == (["z"], "acme", ["c"])
+    assert await app.exec(query_params={"page": 1}, headers={"X-Tenant": "beta"}) == (
+        ["x", "y"],
+        "beta",
+        ["a", "b"],
+    )
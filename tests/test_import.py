@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+# Cumulative `import fastexec` time budget, in microseconds
+IMPORT_TIME_BUDGET_US = 50_000
+
+
+def test_import_is_lazy_and_within_budget():
+    code = (
+        "import sys, fastexec; "
+        "print(sorted(m for m in sys.modules "
+        "if m.split('.')[0] in ('fastapi', 'starlette', 'pydantic')))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.strip() == "[]"
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative = next(
+        int(_line.split("|")[1])
+        for _line in completed.stderr.splitlines()
+        if _line.split("|")[-1].strip() == "fastexec"
+    )
+    assert cumulative < IMPORT_TIME_BUDGET_US
+
+
+def test_lazy_public_names():
+    import fastexec
+
+    assert fastexec.__version__
+    assert fastexec.FastExec.__name__ == "FastExec"
+    assert set(fastexec.__all__) <= set(dir(fastexec))
@@ -0,0 +1,261 @@
+import asyncio
+import concurrent.futures
+import time
+import typing
+
+import fastapi
+import pydantic
+import pytest
+
+from fastexec import FastExec, ValidationErrors, get_dependant
+from fastexec._plan import ExecutionPlan
+
+
+def get_config():
+    return {"api_key": "secret_api_key"}
+
+
+def get_db(config: dict = fastapi.Depends(get_config)):
+    return "db"
+
+
+def get_auth_service(config: dict = fastapi.Depends(get_config)):
+    return f"auth {config['api_key']}"
+
+
+async def endpoint(
+    q: int,
+    x_token: str = fastapi.Header(),
+    db: str = fastapi.Depends(get_db),
+    auth_service: str = fastapi.Depends(get_auth_service),
+):
+    return {"q": q, "x_token": x_token, "db": db, "auth_service": auth_service}
+
+
+def test_compile_dedupes_shared_dependencies():
+    plan = ExecutionPlan.compile(get_dependant(call=endpoint))
+    assert plan is not None
+    assert [node.call for node in plan.nodes] == [
+        get_config,
+        get_db,
+        get_auth_service,
+        endpoint,
+    ]
+    assert plan.nodes[2].sub_dependencies == (("config", 0),)
+
+
+def test_compile_falls_back_for_form_params():
+    def form_endpoint(name: str = fastapi.Form()):
+        return name
+
+    assert ExecutionPlan.compile(get_dependant(call=form_endpoint)) is None
+
+
+@pytest.mark.asyncio
+async def test_plan_exec_matches_solver():
+    app = FastExec(call=endpoint)
+    assert app.plan is not None
+    result = await app.exec(query_params={"q": "1"}, headers={"X-Token": "abc"})
+    assert result == {
+        "q": 1,
+        "x_token": "abc",
+        "db": "db",
+        "auth_service": "auth secret_api_key",
+    }
+
+    app.plan = None
+    assert await app.exec(query_params={"q": "1"}, headers={"X-Token": "abc"}) == (
+        result
+    )
+
+
+@pytest.mark.asyncio
+async def test_plan_exec_validation_errors():
+    app = FastExec(call=endpoint)
+    with pytest.raises(fastapi.HTTPException) as exc_info:
+        await app.exec(query_params={"q": "not-an-int"})
+    assert exc_info.value.status_code == 400
+    assert "int_parsing" in exc_info.value.detail
+    assert "missing" in exc_info.value.detail
+
+
+@pytest.mark.asyncio
+async def test_plan_exec_returns_validation_errors():
+    app = FastExec(call=endpoint, error_mode="return")
+    result = await app.exec(query_params={"q": "not-an-int"})
+    assert isinstance(result, ValidationErrors)
+    assert [(e["loc"], e["type"]) for e in result.errors] == [
+        (("query", "q"), "int_parsing"),
+        (("header", "x-token"), "missing"),
+    ]
+
+    fail_fast = FastExec(call=endpoint, error_mode="return", fail_fast=True)
+    result = await fail_fast.exec(query_params={"q": "not-an-int"})
+    assert [e["type"] for e in result.errors] == ["int_parsing"]
+
+    results = await fail_fast.exec_many(
+        [
+            {"query_params": {"q": "x"}},
+            {"query_params": {"q": 1}, "headers": {"X-Token": "t"}},
+        ]
+    )
+    assert isinstance(results[0].error, ValidationErrors)
+    assert results[1].ok and results[1].value["q"] == 1
+
+
+class Item(pydantic.BaseModel):
+    name: str
+    price: float
+
+
+@pytest.mark.asyncio
+async def test_plan_passes_body_model_through():
+    async def create_item(request: fastapi.Request, item: Item):
+        return item, await request.json(), await request.body()
+
+    app = FastExec(call=create_item)
+    item = Item(name="Sample Item", price=29.99)
+    result, json_body, raw_body = await app.exec(body=item)
+    assert result is item
+    assert json_body == {"name": "Sample Item", "price": 29.99}
+    assert raw_body == b'{"name":"Sample Item","price":29.99}'
+
+    result, _, _ = await app.exec(body={"name": "Sample Item", "price": "29.99"})
+    assert result == item
+
+    # Generic body types are validated as usual
+    async def sum_values(values: typing.Dict[str, int] = fastapi.Body()):
+        return sum(values.values())
+
+    assert await FastExec(call=sum_values).exec(body={"a": 1, "b": "2"}) == 3
+
+
+@pytest.mark.asyncio
+async def test_plan_parallel_resolves_siblings_concurrently():
+    calls = []
+
+    async def get_config():
+        calls.append("config")
+        return {"name": "app"}
+
+    async def get_db(config: dict = fastapi.Depends(get_config)):
+        await asyncio.sleep(0.1)
+        return "db"
+
+    async def get_auth(config: dict = fastapi.Depends(get_config)):
+        await asyncio.sleep(0.1)
+        return "auth"
+
+    def get_app_name(config: dict = fastapi.Depends(get_config)):
+        time.sleep(0.1)
+        return config["name"]
+
+    async def endpoint(
+        db: str = fastapi.Depends(get_db),
+        auth: str = fastapi.Depends(get_auth),
+        name: str = fastapi.Depends(get_app_name),
+    ):
+        return db, auth, name
+
+    plan = ExecutionPlan.compile(get_dependant(call=endpoint))
+    assert [[plan.nodes[_i].call for _i in _l] for _l in plan.levels] == [
+        [get_config],
+        [get_db, get_auth, get_app_name],
+        [endpoint],
+    ]
+
+    started = time.perf_counter()
+    assert await FastExec(call=endpoint, parallel=True).exec() == ("db", "auth", "app")
+    assert time.perf_counter() - started < 0.25
+    assert calls == ["config"]  # Shared dependency still resolved once
+
+    async def get_failing(config: dict = fastapi.Depends(get_config)):
+        raise fastapi.HTTPException(status_code=401)
+
+    async def failing_endpoint(
+        db: str = fastapi.Depends(get_db), user=fastapi.Depends(get_failing)
+    ):
+        return db
+
+    with pytest.raises(fastapi.HTTPException) as exc_info:
+        await FastExec(call=failing_endpoint, parallel=True).exec()
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_plan_freezes_request_independent_dependencies():
+    calls = []
+
+    def get_settings():
+        calls.append("settings")
+        return {"flag": True}
+
+    async def get_client(settings: dict = fastapi.Depends(get_settings)):
+        calls.append("client")
+        return f"client {settings['flag']}"
+
+    def get_user(
+        x_user: str = fastapi.Header(), client: str = fastapi.Depends(get_client)
+    ):
+        calls.append("user")
+        return f"{x_user} via {client}"
+
+    def endpoint(
+        user: str = fastapi.Depends(get_user), client=fastapi.Depends(get_client)
+    ):
+        return user
+
+    plan = ExecutionPlan.compile(get_dependant(call=endpoint))
+    assert [plan.nodes[_i].call for _i in plan.static_indexes] == [
+        get_settings,
+        get_client,
+    ]
+
+    lazy = FastExec(call=endpoint, freeze="lazy")
+    assert (
+        lazy.frozen_nodes == [get_settings, get_client] and lazy.frozen_values is None
+    )
+    for _ in range(2):
+        assert await lazy.exec(headers={"X-User": "u"}) == "u via client True"
+    assert calls == ["settings", "client", "user", "user"]
+
+    calls.clear()
+    # Sync dependencies are solved right away, async ones on the first call
+    eager = FastExec(call=endpoint, freeze="eager")
+    assert calls == ["settings"]
+    assert await eager.exec(headers={"X-User": "u"}) == "u via client True"
+    await eager.refresh_frozen()
+    assert calls == ["settings", "client", "user", "settings", "client"]
+
+
+def test_plan_eager_freeze_defers_async_dependencies():
+    async def get_client():
+        # Stands for a client bound to the loop it is created in
+        return asyncio.get_running_loop()
+
+    async def endpoint(client=fastapi.Depends(get_client)):
+        return client is asyncio.get_running_loop()
+
+    # E.g. created at module level, then called in `asyncio.run()`
+    app = FastExec(call=endpoint, freeze="eager")
+    assert app.frozen_values == {}
+    assert asyncio.run(app.exec()) is True
+    assert app.is_frozen
+
+
+def test_plan_lazy_freeze_concurrent_exec_sync():
+    calls = []
+
+    def get_settings():
+        calls.append("settings")
+        time.sleep(0.1)
+        return {"flag": True}
+
+    def endpoint(settings: dict = fastapi.Depends(get_settings)):
+        return settings["flag"]
+
+    app = FastExec(call=endpoint, freeze="lazy")
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(lambda _: app.exec_sync(), range(4))) == [True] * 4
+    assert calls == ["settings"]
+    assert asyncio.run(app.exec()) is True  # Still usable from a loop
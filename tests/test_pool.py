@@ -0,0 +1,96 @@
+import fastapi
+import pytest
+
+from fastexec import FastExec, FastExecPool
+
+
+def init_state(prefix: str):
+    # Runs once in each worker, the state never has to be pickled
+    return {"prefix": prefix}
+
+
+def get_prefix(request: fastapi.Request):
+    return request.app.state.prefix
+
+
+def cpu_endpoint(n: int, prefix: str = fastapi.Depends(get_prefix)):
+    if n < 0:
+        raise ValueError("negative")
+    return f"{prefix}{sum(i * i for i in range(n))}"
+
+
+def test_fast_exec_pool():
+    with FastExecPool(
+        cpu_endpoint, processes=2, initializer=init_state, initargs=("sum=",)
+    ) as pool:
+        inputs = [{"query_params": {"n": n}} for n in range(-1, 50)]
+        results = pool.exec_many(inputs, chunksize=4)
+
+        assert [r.index for r in results] == list(range(51))
+        assert isinstance(results[0].error, ValueError)
+        assert results[4].value == "sum=5"
+        assert sorted(r.index for r in pool.map(inputs[:10], chunksize=3)) == list(
+            range(10)
+        )
+
+        stats = pool.stats()
+        assert 1 <= len(stats) <= 2
+        assert sum(s.executions for s in stats) == 61
+        assert sum(s.errors for s in stats) == 2
+        assert all(s.throughput > 0 for s in stats)
+
+
+def test_fast_exec_pool_needs_importable_call():
+    def local_endpoint():
+        return 1
+
+    with pytest.raises(ValueError):
+        FastExecPool(local_endpoint)
+
+
+async def async_endpoint(n: int):
+    return n * 2
+
+
+def test_fast_exec_pool_captures_invalid_inputs():
+    inputs = [{"query_params": {"n": 2}}, {"query_params": {"n": "x"}}]
+    with FastExecPool(async_endpoint, processes=1) as pool:
+        ok, invalid = pool.exec_many(inputs)
+
+    assert ok.value == 4
+    assert isinstance(invalid.error, fastapi.HTTPException)
+    assert invalid.error.status_code == 400
+
+
+def test_fast_exec_pool_after_background_loop():
+    # Forked workers must not reuse the parent's background loop
+    assert FastExec(call=async_endpoint).exec_sync(query_params={"n": 1}) == 2
+    with FastExecPool(async_endpoint, processes=1) as pool:
+        assert [r.value for r in pool.exec_many([{"query_params": {"n": 3}}])] == [6]
+
+
+class QuotaError(Exception):
+    def __init__(self, *, user: str):
+        super().__init__(f"quota exceeded for {user}")
+
+
+def failing_endpoint(kind: str):
+    if kind == "http":
+        raise fastapi.HTTPException(
+            status_code=429, detail={"retry": 5}, headers={"Retry-After": "5"}
+        )
+    raise QuotaError(user="alice")
+
+
+def test_fast_exec_pool_rebuilds_errors():
+    inputs = [{"query_params": {"kind": "http"}}, {"query_params": {"kind": "quota"}}]
+    with FastExecPool(failing_endpoint, processes=1) as pool:
+        http, quota = pool.exec_many(inputs)
+
+    assert isinstance(http.error, fastapi.HTTPException)
+    assert http.error.status_code == 429
+    assert http.error.detail == {"retry": 5}
+    assert http.error.headers == {"Retry-After": "5"}
+    # Errors that can not be rebuilt from their arguments are sent as text
+    assert isinstance(quota.error, RuntimeError)
+    assert str(quota.error) == "QuotaError: quota exceeded for alice"
@@ -0,0 +1,96 @@
+import json
+import typing
+
+import fastapi
+import pydantic
+import pytest
+
+from fastexec import Dispatcher, FastExec
+
+
+class Item(pydantic.BaseModel):
+    name: str
+    price: float
+
+
+class Row:
+    # Attribute based, like ORM objects
+    def __init__(self, name: str, price: float, secret: str):
+        self.name, self.price, self.secret = name, price, secret
+
+
+def list_items() -> typing.List[Item]:
+    return [Row("pen", 1.5, "hidden"), {"name": "ink", "price": "2"}]
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_response_modes():
+    models = await FastExec(call=list_items, response="model").exec()
+    assert models == [Item(name="pen", price=1.5), Item(name="ink", price=2.0)]
+
+    jsonable = await FastExec(call=list_items, response="jsonable").exec()
+    assert jsonable == [{"name": "pen", "price": 1.5}, {"name": "ink", "price": 2.0}]
+
+    encoded = await FastExec(call=list_items, response="json").exec()
+    assert isinstance(encoded, bytes) and json.loads(encoded) == jsonable
+
+    # Explicit response model, results of untyped endpoints are only encoded
+    app = FastExec(call=lambda: {"name": "pen", "price": 1}, response="json")
+    assert app.exec_sync() == b'{"name":"pen","price":1}'
+    app = FastExec(call=lambda: {"name": "pen"}, response="model", response_model=Item)
+    with pytest.raises(fastapi.exceptions.ResponseValidationError):
+        await app.exec()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_applies_route_response_model():
+    router = fastapi.APIRouter()
+    router.get("/items", response_model=typing.List[Item])(
+        lambda: [Row("pen", 1.5, "hidden")]
+    )
+
+    dispatcher = Dispatcher(router, response="jsonable")
+    assert await dispatcher.exec("GET", "/items") == [{"name": "pen", "price": 1.5}]
+
+
+class AliasedItem(pydantic.BaseModel):
+    item_name: str = pydantic.Field(alias="itemName")
+    tags: typing.List[str] = []
+
+
+@pytest.mark.asyncio
+async def test_response_options_match_fastapi():
+    app = fastapi.FastAPI()
+    app.get("/item", response_model=AliasedItem, response_model_exclude_unset=True)(
+        lambda: {"itemName": "pen"}
+    )
+
+    # What FastAPI sends: aliases, without the unset fields
+    assert await Dispatcher(app, response="jsonable").exec("GET", "/item") == {
+        "itemName": "pen"
+    }
+
+    aliased = FastExec(call=lambda: AliasedItem(itemName="pen"), response="json")
+    assert aliased.exec_sync() == b'{"itemName":"pen","tags":[]}'
+
+
+class UserOut(pydantic.BaseModel):
+    name: str
+
+
+class UserIn(UserOut):
+    password: str
+
+
+@pytest.mark.asyncio
+async def test_response_model_filters_subclass_fields():
+    def get_user() -> UserOut:
+        return UserIn(name="a", password="secret")
+
+    for mode, expected in (
+        ("model", UserOut(name="a")),
+        ("jsonable", {"name": "a"}),
+        ("json", b'{"name":"a"}'),
+    ):
+        result = await FastExec(call=get_user, response=mode).exec()
+        assert result == expected and type(result) is type(expected)
@@ -0,0 +1,85 @@
+import asyncio
+
+import fastapi
+import pydantic
+import pytest
+
+from fastexec import RemoteError, RpcClient, RpcServer, ValidationErrors
+
+
+class Item(pydantic.BaseModel):
+    name: str
+    price: float
+
+
+def get_token(x_token: str = fastapi.Header()):
+    return x_token
+
+
+async def create_item(item: Item, token: str = fastapi.Depends(get_token)) -> Item:
+    await asyncio.sleep(0.01)
+    return Item(name=f"{item.name} by {token}", price=item.price)
+
+
+async def upload(request: fastapi.Request):
+    return len(await request.body())
+
+
+def fail(n: int):
+    raise fastapi.HTTPException(status_code=409, detail=f"conflict {n}")
+
+
+@pytest.mark.asyncio
+async def test_rpc_unix_socket(tmp_path):
+    path = tmp_path / "worker.sock"
+    async with RpcServer([create_item, upload, fail], path=path) as server:
+        async with RpcClient(path, pool_size=2) as client:
+            # Many concurrent requests share the pooled connections
+            results = await asyncio.gather(
+                *(
+                    client.call(
+                        "create_item",
+                        body={"name": f"item{i}", "price": i},
+                        headers={"X-Token": "t"},
+                    )
+                    for i in range(50)
+                )
+            )
+            assert results[7] == {"name": "item7 by t", "price": 7.0}
+            assert len(client.connections) == 2
+
+            assert await client.call("upload", body=bytearray(100_000)) == 100_000
+
+            with pytest.raises(RemoteError) as e:
+                await client.call("fail", query_params={"n": 1})
+            assert e.value.type_name == "HTTPException"
+            assert (e.value.status_code, e.value.detail) == (409, "conflict 1")
+            with pytest.raises(RemoteError):
+                await client.call("missing")
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_rpc_tcp_validation_errors():
+    async with RpcServer(
+        {"create": create_item}, port=0, error_mode="return"
+    ) as server:
+        _, port = server.address
+        async with RpcClient(port=port) as client:
+            with pytest.raises(ValidationErrors) as e:
+                await client.call("create", body={"name": "pen"})
+            assert {tuple(_e["loc"]) for _e in e.value.errors} == {
+                ("body", "price"),
+                ("header", "x-token"),
+            }
+
+
+@pytest.mark.asyncio
+async def test_rpc_other_response_modes(tmp_path):
+    path = tmp_path / "worker.sock"
+    for mode in (None, "model", "jsonable"):
+        async with RpcServer({"create": create_item}, path=path, response=mode):
+            async with RpcClient(path) as client:
+                assert await client.call(
+                    "create", body={"name": "pen", "price": 1}, headers={"X-Token": "t"}
+                ) == {"name": "pen by t", "price": 1.0}
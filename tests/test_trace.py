@@ -0,0 +1,84 @@
+import fastapi
+import pytest
+
+from fastexec import CachePolicy, ExecutionTrace, FastExec
+
+
+def get_config():
+    return {"issuer": "auth"}
+
+
+def get_user(
+    authorization: str = fastapi.Header(), config: dict = fastapi.Depends(get_config)
+):
+    return f"{config['issuer']}:{authorization}"
+
+
+async def endpoint(user: str = fastapi.Depends(get_user)):
+    return user
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_trace_hooks():
+    traces = []
+    app = FastExec(
+        call=endpoint,
+        hooks=[traces.append],
+        dependency_cache={get_user: CachePolicy()},
+    )
+    for _ in range(2):
+        await app.exec(headers={"Authorization": "token"})
+
+    first, second = traces
+    assert isinstance(first, ExecutionTrace)
+    assert [n.name for n in first.nodes] == ["get_config", "get_user", "endpoint"]
+    assert first.nodes[-1].is_endpoint
+    assert all(n.wall_time >= 0 for n in first.nodes)
+    assert first.nodes[0].thread_hop_time >= 0
+    assert first.wall_time >= sum(n.wall_time for n in first.nodes[:2])
+    assert [(n.name, n.cache_hit) for n in second.nodes] == [
+        ("get_user", True),
+        ("endpoint", False),
+    ]
+
+    with pytest.raises(fastapi.HTTPException):
+        await app.exec()
+    assert isinstance(traces[-1].error, fastapi.HTTPException)
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_opentelemetry_hook():
+    pytest.importorskip("opentelemetry")
+    from unittest import mock
+
+    from fastexec.utils.otel import OpenTelemetryHook
+
+    tracer = mock.MagicMock()
+    app = FastExec(call=endpoint, hooks=[OpenTelemetryHook(tracer)])
+    await app.exec(headers={"Authorization": "token"})
+
+    span_names = [c.args[0] for c in tracer.start_span.call_args_list]
+    assert span_names == ["fastexec.exec", "get_config", "get_user", "endpoint"]
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_trace_stats_heat_map():
+    from fastexec import TraceStats
+    from fastexec.utils.graph import visualize_dependant
+
+    stats = TraceStats()
+    app = FastExec(
+        call=endpoint, hooks=[stats], dependency_cache={get_user: CachePolicy()}
+    )
+    for _ in range(4):
+        await app.exec(headers={"Authorization": "token"})
+
+    assert stats.executions == 4
+    assert stats.nodes[get_config].count == 1
+    assert stats.nodes[get_user].count == 4
+    assert stats.nodes[get_user].cache_hit_rate == 0.75
+    assert stats.nodes[endpoint].p99 >= stats.nodes[endpoint].mean > 0
+
+    source = visualize_dependant(app.dependant, stats=stats).source
+    assert "calls 4 hit 75%" in source
+    assert "penwidth=2.5" in source
@@ -0,0 +1,63 @@
+import datetime
+import json
+
+import fastapi
+import pytest
+
+from fastexec import FastExec
+from fastexec.utils.codec import (
+    CODECS,
+    JSONCodec,
+    get_codec,
+    get_default_codec,
+    set_default_codec,
+)
+
+
+@pytest.mark.parametrize("name", list(CODECS))
+def test_codec_round_trip(name):
+    pytest.importorskip(name)
+    codec = get_codec(name)
+    data = {"name": "Sample Item", "price": 29.99, "tags": ["a", "b"], 1: None}
+
+    encoded = codec.dumps({**data, "created": datetime.date(2024, 1, 1)})
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == {
+        "name": "Sample Item",
+        "price": 29.99,
+        "tags": ["a", "b"],
+        "1": None,
+        "created": "2024-01-01",
+    }
+    for invalid in (b"not json", b"\x89PNG\x00\x01raw"):
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(invalid)
+
+
+def test_get_codec():
+    assert get_codec() is get_default_codec()
+    assert isinstance(get_codec("auto"), JSONCodec)
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+    previous = get_default_codec()
+    try:
+        assert set_default_codec("json") is get_codec()
+    finally:
+        set_default_codec(previous)
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_with_codec():
+    pytest.importorskip("orjson")
+
+    async def endpoint(request: fastapi.Request, item: dict = fastapi.Body()):
+        return item, await request.body()
+
+    app = FastExec(call=endpoint, codec="orjson")
+    item, raw = await app.exec(body='{"name": "Sample Item"}')
+    assert item == {"name": "Sample Item"}
+    assert raw == b'{"name": "Sample Item"}'
+
+    item, raw = await app.exec(body={"name": "Sample Item"})
+    assert raw == b'{"name":"Sample Item"}'
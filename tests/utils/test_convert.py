@@ -0,0 +1,66 @@
+import datetime
+import io
+import json
+
+import pydantic
+
+from fastexec.utils.convert import LazyBody, to_body, to_headers, to_query_params
+
+
+class Item(pydantic.BaseModel):
+    name: str
+    created: datetime.date
+
+
+def test_to_body_normalizes_without_round_trip():
+    item = Item(name="Sample Item", created=datetime.date(2024, 1, 1))
+    assert to_body({"item": item, "tags": ("a", "b")}) == {
+        "item": {"name": "Sample Item", "created": "2024-01-01"},
+        "tags": ["a", "b"],
+    }
+    assert to_body(item) == {"name": "Sample Item", "created": "2024-01-01"}
+    assert to_query_params({"page": 1}) == {"page": 1}
+    assert to_headers(item) == {"name": "Sample Item", "created": "2024-01-01"}
+
+
+def test_lazy_body_converts_on_demand():
+    item = Item(name="Sample Item", created=datetime.date(2024, 1, 1))
+    body = LazyBody(item)
+    assert body.model is item
+    assert "content" not in body.__dict__
+    assert "raw" not in body.__dict__
+
+    assert json.loads(body.raw) == {"name": "Sample Item", "created": "2024-01-01"}
+    assert "content" not in body.__dict__
+
+    assert LazyBody({"a": 1}).raw == b'{"a": 1}'
+    assert LazyBody(b"not json").content == b"not json"
+    assert LazyBody(b"\x89PNG\x00\x01raw").content == b"\x89PNG\x00\x01raw"
+    assert LazyBody().raw == b"{}"
+
+    # `request.body()` and `request.json()` see the same values
+    body = LazyBody({"at": datetime.datetime(2024, 1, 2), "tags": {"a"}})
+    assert json.loads(body.raw) == body.content
+    assert body.content == {"at": "2024-01-02T00:00:00", "tags": ["a"]}
+
+
+def test_lazy_body_binary_sources():
+    data = b"x" * 100
+    # Declared content type, `bytes` are not sniffed for JSON
+    assert to_body(b'{"a": 1}', content_type="text/plain") == b'{"a": 1}'
+    assert to_body(b'{"a": 1}', content_type="application/vnd+json") == {"a": 1}
+
+    for source in (bytearray(data), memoryview(data), io.BytesIO(data)):
+        body = LazyBody(source)
+        assert list(body.iter_chunks(chunk_size=30)) == [
+            data[0:30],
+            data[30:60],
+            data[60:90],
+            data[90:],
+        ]
+    assert LazyBody(memoryview(b'{"a": 1}')).content == b'{"a": 1}'
+    assert LazyBody(
+        io.BytesIO(b'{"a": 1}'), content_type="application/json"
+    ).content == {"a": 1}
+    body = LazyBody(b'{"a": 1}')
+    assert body.raw is next(body.iter_chunks())
@@ -0,0 +1,60 @@
+import threading
+
+import fastapi
+import pytest
+
+from fastexec import FastExec
+from fastexec.utils.coro import (
+    InlineExecutor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    get_executor,
+)
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_executors():
+    assert await InlineExecutor().run(current_thread_name, {}) == (
+        threading.current_thread().name
+    )
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        assert (await executor.run(current_thread_name, {})).startswith("fastexec")
+    finally:
+        executor.shutdown()
+
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        assert await executor.run(add, {"a": 1, "b": 2}) == 3
+    finally:
+        executor.shutdown()
+
+    with pytest.raises(ValueError):
+        get_executor("fiber")
+
+
+@pytest.mark.asyncio
+async def test_fast_exec_executors():
+    def get_thread_name():
+        return current_thread_name()
+
+    def endpoint(dep_thread: str = fastapi.Depends(get_thread_name)):
+        return dep_thread, current_thread_name()
+
+    async with FastExec(
+        call=endpoint, executor="thread", executors={get_thread_name: "inline"}
+    ) as app:
+        dep_thread, endpoint_thread = await app.exec()
+
+    assert dep_thread == threading.current_thread().name
+    assert endpoint_thread.startswith("fastexec")
+    assert app.executor._pool is None  # Shut down on close
@@ -1,3 +1,4 @@
+import json
 import pathlib
 import tempfile
 
@@ -5,7 +6,14 @@ import fastapi
 import graphviz
 
 from fastexec import get_dependant
-from fastexec.utils.graph import save_dependant_graph_image, visualize_dependant
+from fastexec.utils.graph import (
+    save_dependant_graph,
+    save_dependant_graph_image,
+    to_dot,
+    to_json_graph,
+    to_svg,
+    visualize_dependant,
+)
 
 
 def test_visualize_dependant_simple():
@@ -141,3 +149,68 @@ def test_save_dependant_graph_image_no_suffix():
         # Check at least one PNG file exists
         png_files = list(pathlib.Path(tmpdir).glob("*.png"))
         assert len(png_files) > 0, "No PNG files were created"
+
+
+def make_ladder(depth: int):
+    # Every level depends twice on the level below, 2**depth paths in total
+    def base():
+        return 0
+
+    prev = base
+    for _ in range(depth):
+
+        def make(dep):
+            def left(value: int = fastapi.Depends(dep)):
+                return value
+
+            def right(value: int = fastapi.Depends(dep)):
+                return value
+
+            def join(a: int = fastapi.Depends(left), b: int = fastapi.Depends(right)):
+                return a + b
+
+            return join
+
+        prev = make(prev)
+    return prev
+
+
+def test_visualize_dependant_shared_dependencies_linear():
+    dependant = get_dependant(path="/ladder", call=make_ladder(12))
+
+    graph = json.loads(json.dumps(to_json_graph(dependant)))
+    assert len(graph["nodes"]) == 1 + 3 * 12 + 1
+    assert len(graph["edges"]) == 4 * 12 + 1
+    assert graph["nodes"][0]["id"] == "path_node"
+    root = graph["edges"][-1]["target"]
+    assert graph["adjacency"][root] == ["left_1", "right_36"]
+
+    source = to_dot(dependant)
+    assert source.count("->") == 4 * 12 + 1
+
+    svg = to_svg(dependant)
+    assert svg.startswith("<svg") and svg.count("<g id=") == len(graph["nodes"])
+
+
+def test_save_dependant_graph_without_binary():
+    leaves = []
+    for index in range(2000):
+
+        def make(index):
+            def leaf():
+                return index
+
+            return leaf
+
+        leaves.append(make(index))
+    params = ", ".join(f"d{i}=fastapi.Depends(leaves[{i}])" for i in range(2000))
+    namespace = {"fastapi": fastapi, "leaves": leaves}
+    exec(f"def wide({params}):\n    return 0", namespace)
+    dependant = get_dependant(call=namespace["wide"])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for suffix in ("dot", "svg", "json"):
+            path = save_dependant_graph(dependant, pathlib.Path(tmpdir, f"g.{suffix}"))
+            assert path.stat().st_size > 0
+        graph = json.loads(pathlib.Path(tmpdir, "g.json").read_text())
+        assert len(graph["nodes"]) == 2002